@@ -1,5 +1,6 @@
+import asyncio
 from apparatus.lcd_api import LcdApi
-from utime import sleep_ms
+from utime import sleep_ms, ticks_us, ticks_diff
 
 # The LCD display
 I2C_NUM_ROWS = 2
@@ -23,6 +24,10 @@ class I2cLcd(LcdApi):
     def __init__(self, i2c, i2c_addr, num_lines, num_columns):
         self.i2c = i2c
         self.i2c_addr = i2c_addr
+        # Four bus bytes per LCD byte (two nibbles, each with E high then low),
+        # enough for a full line in one transfer
+        self._buf = bytearray(4 * min(num_columns, 40))
+        self._mv = memoryview(self._buf)
         self.i2c.writeto(self.i2c_addr, bytearray([0]))
         sleep_ms(20)   # Allow LCD time to powerup
         # Send reset 3 times
@@ -58,26 +63,122 @@ class I2cLcd(LcdApi):
         """Allows the hal layer to turn the backlight off."""
         self.i2c.writeto(self.i2c_addr, bytearray([0]))
  
-    def hal_write_command(self, cmd):
-        """Writes a command to the LCD.
- 
+    def _encode(self, i, value, rs):
+        """Encodes one LCD byte as four bus bytes at offset i of the buffer.
+
         Data is latched on the falling edge of E.
         """
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | (((cmd >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | ((cmd & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        byte = (rs | (self.backlight << SHIFT_BACKLIGHT) | (((value >> 4) & 0x0f) << SHIFT_DATA))
+        self._buf[i] = byte | MASK_E
+        self._buf[i + 1] = byte
+        byte = (rs | (self.backlight << SHIFT_BACKLIGHT) | ((value & 0x0f) << SHIFT_DATA))
+        self._buf[i + 2] = byte | MASK_E
+        self._buf[i + 3] = byte
+
+    def _write_command(self, cmd):
+        self._encode(0, cmd, 0)
+        self.i2c.writeto(self.i2c_addr, self._mv[:4])
+
+    def hal_write_command(self, cmd):
+        """Writes a command to the LCD in a single transfer."""
+        self._write_command(cmd)
         if cmd <= 3:
             # The home and clear commands require a worst case delay of 4.1 msec
             sleep_ms(5)
+
+    async def hal_write_command_async(self, cmd):
+        """Same as hal_write_command, yielding to other tasks during the delay."""
+        self._write_command(cmd)
+        if cmd <= 3:
+            await asyncio.sleep_ms(5)
  
     def hal_write_data(self, data):
-        """Write data to the LCD."""
-        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | (((data >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | ((data & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
\ No newline at end of file
+        """Write data to the LCD in a single transfer."""
+        self._encode(0, data, MASK_RS)
+        self.i2c.writeto(self.i2c_addr, self._mv[:4])
+
+    def hal_write_data_bulk(self, data):
+        """Write a sequence of data bytes to the LCD, a buffer full per transfer.
+
+        At 400 kHz each bus byte takes ~22 usec, longer than the LCD needs to
+        latch a nibble, so the whole sequence can go out back to back.
+        """
+        chunk = len(self._buf) // 4
+        for start in range(0, len(data), chunk):
+            n = min(chunk, len(data) - start)
+            for j in range(n):
+                self._encode(4 * j, data[start + j], MASK_RS)
+            self.i2c.writeto(self.i2c_addr, self._mv[:4 * n])
+
+
+class FakeI2C:
+
+    def __init__(self, byte_us=0):
+        """
+        Stand-in for machine.I2C that counts transfers and bytes, for host benchmarks
+        :param byte_us: Time each byte holds the bus [usec], ~23 at 400 kHz
+        """
+        self.byte_us = byte_us
+        self.transactions = 0
+        self.bytes = 0
+
+    def writeto(self, addr, buf):
+        self.transactions += 1
+        self.bytes += len(buf)
+        # Busy wait like a blocking transfer would
+        start = ticks_us()
+        while ticks_diff(ticks_us(), start) < self.byte_us * len(buf):
+            pass
+        return len(buf)
+
+
+if __name__ == "__main__":
+    i2c = FakeI2C()
+    lcd = I2cLcd(i2c, DEFAULT_I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS)
+    text = "172.4F +1.2/min\n192.168.100.123"
+
+    def count(write):
+        lcd.clear()
+        i2c.transactions = 0
+        i2c.bytes = 0
+        write(text)
+        return i2c.transactions, i2c.bytes
+
+    def write_per_byte(value, rs):
+        # The original HAL, a transfer for each of the four bus bytes of a command or character
+        lcd._encode(0, value, rs)
+        for j in range(4):
+            i2c.writeto(lcd.i2c_addr, lcd._mv[j:j + 1])
+
+    def per_byte(string):
+        # The original putstr and putchar on the original HAL, cursor moves included
+        x = y = 0
+        for char in string:
+            if char != '\n':
+                write_per_byte(ord(char), MASK_RS)
+                x += 1
+            if x >= lcd.num_columns or char == '\n':
+                x = 0
+                y = (y + 1) % lcd.num_lines
+                addr = (0x40 if y & 1 else 0) + (0x14 if y & 2 else 0)
+                write_per_byte(lcd.LCD_DDRAM | addr, 0)
+
+    def per_char(string):
+        # One transfer per character
+        for char in string:
+            LcdApi.putchar(lcd, char)
+
+    results = [
+        ('per bus byte', count(per_byte)),
+        ('per character', count(per_char)),
+        ('bulk putstr', count(lcd.putstr)),
+        ('full update', count(lcd.update)),
+    ]
+    # Only the temperature changes between heartbeats
+    i2c.transactions = 0
+    i2c.bytes = 0
+    lcd.update(text.replace('172.4', '172.5'))
+    results.append(('differential update', (i2c.transactions, i2c.bytes)))
+
+    for name, (transactions, n_bytes) in results:
+        print(f'{name:20s} {transactions:4d} transactions {n_bytes:5d} bytes')
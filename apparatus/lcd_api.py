@@ -1,6 +1,7 @@
 """Provides an API for talking to HD44780 compatible character LCDs."""
  
-import time
+import utime
+import asyncio
  
  
 class LcdApi:
@@ -57,6 +58,10 @@ class LcdApi:
             self.num_columns = 40
         self.cursor_x = 0
         self.cursor_y = 0
+        # Shadow of the characters on screen, for differential updates
+        self.shadow = bytearray(b' ' * (self.num_lines * self.num_columns))
+        # Run of characters gathered for one bulk write
+        self._run = bytearray(self.num_columns)
         self.backlight = True
         self.display_off()
         self.backlight_on()
@@ -71,8 +76,21 @@ class LcdApi:
         """
         self.hal_write_command(self.LCD_CLR)
         self.hal_write_command(self.LCD_HOME)
+        self._home()
+
+    async def clear_async(self):
+        """Same as clear, yielding to other tasks while the LCD executes the
+        commands instead of blocking.
+        """
+        await self.hal_write_command_async(self.LCD_CLR)
+        await self.hal_write_command_async(self.LCD_HOME)
+        self._home()
+
+    def _home(self):
         self.cursor_x = 0
         self.cursor_y = 0
+        for i in range(len(self.shadow)):
+            self.shadow[i] = 0x20
  
     def show_cursor(self):
         """Causes the cursor to be made visible."""
@@ -138,6 +156,8 @@ class LcdApi:
         """
         if char != '\n':
             self.hal_write_data(ord(char))
+            if self.cursor_x < self.num_columns and self.cursor_y < self.num_lines:
+                self.shadow[self.cursor_y * self.num_columns + self.cursor_x] = ord(char)
             self.cursor_x += 1
         if self.cursor_x >= self.num_columns or char == '\n':
             self.cursor_x = 0
@@ -149,20 +169,89 @@ class LcdApi:
     def putstr(self, string):
         """Write the indicated string to the LCD at the current cursor
         position and advances the cursor position appropriately.
+
+        Characters up to the end of each line are sent in one bulk write.
         """
+        run = 0
         for char in string:
-            self.putchar(char)
- 
+            if char != '\n':
+                self._run[run] = ord(char)
+                run += 1
+            if char == '\n' or self.cursor_x + run >= self.num_columns:
+                self._flush_run(run)
+                run = 0
+                self.cursor_x = 0
+                self.cursor_y += 1
+                if self.cursor_y >= self.num_lines:
+                    self.cursor_y = 0
+                self.move_to(self.cursor_x, self.cursor_y)
+        self._flush_run(run)
+
+    def update(self, string):
+        """Show the indicated string on the whole display, writing only the
+        characters that differ from what is already on screen. Lines are
+        separated by '\\n' and padded with spaces; the display is never cleared.
+        """
+        for _ in self._update_runs(string):
+            pass
+
+    async def update_async(self, string):
+        """Same as update, yielding to other tasks after each run of
+        characters, so a redraw never holds the event loop for more than one
+        bus transfer.
+        """
+        for _ in self._update_runs(string):
+            await asyncio.sleep_ms(0)
+
+    def _update_runs(self, string):
+        """Generator behind update, yields after each run is sent."""
+        cols = self.num_columns
+        lines = string.split('\n')
+        for y in range(self.num_lines):
+            line = lines[y] if y < len(lines) else ''
+            run = 0
+            for x in range(cols):
+                code = ord(line[x]) if x < len(line) else 0x20
+                changed = self.shadow[y * cols + x] != code
+                if run and not changed and x + 1 < cols:
+                    # Rewriting a single unchanged cell is cheaper than moving past it
+                    following = ord(line[x + 1]) if x + 1 < len(line) else 0x20
+                    changed = self.shadow[y * cols + x + 1] != following
+                if changed:
+                    if run == 0:
+                        # Only move the cursor when it isn't already on this cell
+                        if self.cursor_x != x or self.cursor_y != y:
+                            self.move_to(x, y)
+                    self._run[run] = code
+                    run += 1
+                elif run:
+                    self._flush_run(run)
+                    run = 0
+                    yield
+            if run:
+                self._flush_run(run)
+                yield
+
+    def _flush_run(self, run):
+        """Send the first run characters gathered at the cursor and advance it."""
+        if run == 0:
+            return
+        self.hal_write_data_bulk(memoryview(self._run)[:run])
+        start = self.cursor_y * self.num_columns + self.cursor_x
+        if self.cursor_y < self.num_lines:
+            self.shadow[start:start + run] = self._run[:run]
+        self.cursor_x += run
+
     def custom_char(self, location, charmap):
         """Write a character to one of the 8 CGRAM locations, available
         as chr(0) through chr(7).
         """
         location &= 0x7
         self.hal_write_command(self.LCD_CGRAM | (location << 3))
-        time.sleep_us(40)
+        utime.sleep_us(40)
         for i in range(8):
             self.hal_write_data(charmap[i])
-            time.sleep_us(40)
+            utime.sleep_us(40)
         self.move_to(self.cursor_x, self.cursor_y)
  
     def hal_backlight_on(self):
@@ -187,10 +276,26 @@ class LcdApi:
         """
         raise NotImplementedError
  
+    async def hal_write_command_async(self, cmd):
+        """Write a command to the LCD, yielding to other tasks while it executes.
+
+        A derived HAL class may override this to wait out the command's delay
+        asynchronously; by default it blocks like hal_write_command.
+        """
+        self.hal_write_command(cmd)
+
     def hal_write_data(self, data):
         """Write data to the LCD.
  
         It is expected that a derived HAL class will implement this
         function.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def hal_write_data_bulk(self, data):
+        """Write a sequence of data bytes to the LCD.
+
+        A derived HAL class may override this to batch the transfer.
+        """
+        for byte in data:
+            self.hal_write_data(byte)
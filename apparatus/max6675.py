@@ -55,7 +55,15 @@ class MAX6675:
         Signals if the measurement is finished.
         :return: True if the measurement is ready for reading.
         """
-        return utime.ticks_ms() - self._last_measurement_start > MAX6675.MEASUREMENT_PERIOD_MS
+        return utime.ticks_diff(utime.ticks_ms(), self._last_measurement_start) > MAX6675.MEASUREMENT_PERIOD_MS
+
+    def ready_in_ms(self):
+        """
+        Time until the current measurement is finished.
+        :return: Milliseconds until `ready` becomes True, 0 if it already is.
+        """
+        elapsed = utime.ticks_diff(utime.ticks_ms(), self._last_measurement_start)
+        return max(0, MAX6675.MEASUREMENT_PERIOD_MS + 1 - elapsed)
 
     def error(self):
         """
@@ -108,4 +116,63 @@ class MAX6675:
         return self.read_celsius() * (9/5) + 32
     
     def calibrate(self, value):
-        return value * CAL_FACTOR + CAL_OFFSET
\ No newline at end of file
+        return value * CAL_FACTOR + CAL_OFFSET
+
+class MAX6675SPI(MAX6675):
+
+    def __init__(self, spi, cs):
+        """
+        Creates a new object for reading MAX6675 over hardware SPI
+        :param spi: machine.SPI bus, mode 0 (polarity=0, phase=0) at up to 4.3 MHz
+        :param cs: CS (select) pin, must be configured as Pin.OUT
+        """
+        self._spi = spi
+        self._cs = cs
+        self._cs.high()
+
+        # Preallocated frame buffer, read in a single transfer
+        self._buf = bytearray(2)
+
+        self._last_measurement_start = 0
+        self._last_read_temp = 0
+        self._error = 0
+
+    def read_celsius(self):
+        """
+        Reads the last measurement and starts a new one. If a new measurement is not ready yet, it returns the last value.
+        :return: Measured temperature
+        """
+        if self.ready():
+            # Read the 16-bit frame, bringing CS high again starts a new conversion
+            self._cs.low()
+            self._spi.readinto(self._buf)
+            self._cs.high()
+            self._last_measurement_start = utime.ticks_ms()
+
+            # Bit 15 is a dummy sign bit, bits 14-3 the temperature and bit 2 the open input flag
+            frame = (self._buf[0] << 8) | self._buf[1]
+            self._error = (frame >> 2) & 0x01
+            self._last_read_temp = self.calibrate((frame >> 3) & 0x0fff)
+
+        return self._last_read_temp
+
+
+class FakeSPI:
+
+    def __init__(self, celsius=20, error=0):
+        """
+        Stand-in for machine.SPI that answers reads with a MAX6675 frame, for host tests
+        :param celsius: Temperature encoded in the frame, before calibration
+        :param error: Open thermocouple bit
+        """
+        self.reads = 0
+        self.set_temperature(celsius, error)
+
+    def set_temperature(self, celsius, error=0):
+        value = int(round(celsius / CAL_FACTOR)) & 0x0fff
+        self._frame = (value << 3) | ((error & 0x01) << 2)
+
+    def readinto(self, buf, write=0x00):
+        self.reads += 1
+        buf[0] = (self._frame >> 8) & 0xff
+        buf[1] = self._frame & 0xff
@@ -0,0 +1,110 @@
+import asyncio
+import utime
+from array import array
+
+
+class ProbeRegistry:
+
+    def __init__(self):
+        """
+        Several MAX6675s on a shared SCK/SO bus, each with its own CS line. Each
+        chip converts on its own schedule, so the probes are read in the order
+        their conversions complete, which comes out round-robin. Readings are
+        accumulated per probe until the next heartbeat takes their average.
+        With a single probe, it reads every conversion of that one.
+        """
+        self.names = []
+        self.sensors = []
+        self.samples = 0                # Total readings taken
+        self.rejected = 0               # Readings dropped for an open thermocouple
+        self._sum = array('f')
+        self._ticks_sum = array('l')
+        self._count = array('l')
+        self._origin = array('l')       # ticks_ms of the first reading in each batch
+
+    def add(self, name, sensor):
+        """
+        Register a probe.
+        :param name: Name reported over HTTP, e.g. 'breast'
+        :param sensor: MAX6675 or MAX6675SPI with its own CS pin
+        """
+        self.names.append(name)
+        self.sensors.append(sensor)
+        self._sum.append(0)
+        self._ticks_sum.append(0)
+        self._count.append(0)
+        self._origin.append(0)
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def next_due(self, last):
+        """
+        The probe whose conversion finishes first, ties going round-robin.
+        :param last: Index of the probe read last
+        :return: (index, ms until its conversion is done)
+        """
+        n = len(self.sensors)
+        index = 0
+        wait = None
+        for k in range(n):
+            i = (last + 1 + k) % n
+            ready_in = self.sensors[i].ready_in_ms()
+            if wait is None or ready_in < wait:
+                index = i
+                wait = ready_in
+        return index, wait
+
+    async def run(self):
+        """
+        Acquisition loop, run as its own task.
+        """
+        last = len(self.sensors) - 1
+        while True:
+            index, wait = self.next_due(last)
+            # Yield even when a conversion is already done, so a slow read can't starve the loop
+            await asyncio.sleep(wait / 1000)
+            last = index
+
+            sensor = self.sensors[index]
+            value = sensor.read_fahrenheit()
+            self.accumulate(None if sensor.error() else value, utime.ticks_ms(), index)
+
+    def accumulate(self, value, ticks, index=0):
+        """
+        Add a reading to a probe's current batch.
+        :param value: Temperature [F], or None for an open thermocouple
+        :param ticks: ticks_ms of the reading
+        :param index: Probe index, in registration order
+        """
+        self.samples += 1
+        if value is None:
+            self.rejected += 1
+            return
+
+        # Timestamps are summed relative to the first reading to keep them small
+        if not self._count[index]:
+            self._origin[index] = ticks
+        self._sum[index] += value
+        self._ticks_sum[index] += utime.ticks_diff(ticks, self._origin[index])
+        self._count[index] += 1
+
+    def take(self, index=0):
+        """
+        Average of a probe's readings since the last call.
+        :param index: Probe index, in registration order
+        :return: (temperature, ticks_ms, count), where ticks_ms is the mean time of the
+            readings, or None if no reading has completed since the last call.
+        """
+        count = self._count[index]
+        if not count:
+            return None
+
+        value = self._sum[index] / count
+        ticks = utime.ticks_add(self._origin[index], int(self._ticks_sum[index] / count))
+
+        self._sum[index] = 0
+        self._ticks_sum[index] = 0
+        self._count[index] = 0
+
+        return value, ticks, count
@@ -0,0 +1,126 @@
+import struct
+import utime
+
+# File header: magic, version, value scale [counts per F], reserved, wall clock at start [epoch sec]
+HEADER = '<4sBBHI'
+MAGIC = b'PTRC'
+VERSION = 2
+SCALE = 50
+
+# Record: ms since the previous record, reading [1/SCALE F] or ERROR for an open thermocouple
+RECORD = '<Hh'
+RECORD_SIZE = struct.calcsize(RECORD)
+ERROR = -32768
+
+# A gap of GAP ms or more, e.g. a stall during a Wi-Fi reconnect, is written
+# as GAP in the record followed by the full gap [ms] in GAP_RECORD. Version 1
+# files clamped such gaps to GAP.
+GAP = 0xffff
+GAP_RECORD = '<I'
+
+
+class SensorRecorder:
+
+    def __init__(self, sensor, path, buffer_records=128, flush_ms=30000):
+        """
+        Wraps a MAX6675 and appends every read_fahrenheit value, with the time
+        since the previous one, to a compact binary file (4 bytes per reading,
+        about 400 kB for 6 hours of readings at every conversion). Readings are
+        buffered in memory and written when the buffer fills or flush_ms has
+        passed, to spare the flash without losing much on a power cut. The
+        file is only created at the first write, so wrapping a sensor that is
+        never read leaves an existing recording alone.
+        :param sensor: MAX6675, MAX6675SPI or anything with the same interface
+        :param path: File to write, replaced if it exists
+        :param buffer_records: Readings held before each write
+        :param flush_ms: Longest time readings are held before a write [ms]
+        """
+        self.sensor = sensor
+        self.path = path
+        self.flush_ms = flush_ms
+        self.records = 0
+        self._buf = bytearray(max(2, buffer_records) * RECORD_SIZE)
+        self._used = 0
+        self._last = utime.ticks_ms()
+        self._flushed = self._last
+        self._epoch = utime.time()
+        self._created = False
+
+    def read_fahrenheit(self):
+        value = self.sensor.read_fahrenheit()
+        now = utime.ticks_ms()
+        delta = utime.ticks_diff(now, self._last)
+        self._last = now
+
+        if delta >= GAP and len(self._buf) - self._used < 2 * RECORD_SIZE:
+            # Room for the gap to follow its record
+            self.flush()
+
+        code = ERROR if self.sensor.error() else max(-32767, min(32767, int(round(value * SCALE))))
+        struct.pack_into(RECORD, self._buf, self._used, min(delta, GAP), code)
+        self._used += RECORD_SIZE
+        if delta >= GAP:
+            struct.pack_into(GAP_RECORD, self._buf, self._used, delta)
+            self._used += RECORD_SIZE
+        self.records += 1
+        if self._used == len(self._buf) or utime.ticks_diff(now, self._flushed) >= self.flush_ms:
+            self.flush()
+
+        return value
+
+    def flush(self):
+        """
+        Append the buffered readings to the file, creating it with its header
+        the first time.
+        """
+        self._flushed = utime.ticks_ms()
+        if not self._used:
+            return
+        with open(self.path, 'ab' if self._created else 'wb') as f:
+            if not self._created:
+                f.write(struct.pack(HEADER, MAGIC, VERSION, SCALE, 0, self._epoch))
+                self._created = True
+            f.write(memoryview(self._buf)[:self._used])
+        self._used = 0
+
+    # The rest of the sensor interface passes through
+    def read_celsius(self):
+        return (self.read_fahrenheit() - 32) * 5 / 9
+
+    def ready(self):
+        return self.sensor.ready()
+
+    def ready_in_ms(self):
+        return self.sensor.ready_in_ms()
+
+    def error(self):
+        return self.sensor.error()
+
+
+def read_recording(path):
+    """
+    Read a file written by SensorRecorder.
+    :param path: Recording file
+    :return: (epoch, records), the wall clock at the start [epoch sec] and a
+        generator of (ms since the previous reading, temperature [F] or None on error)
+    """
+    f = open(path, 'rb')
+    magic, version, scale, _, epoch = struct.unpack(HEADER, f.read(struct.calcsize(HEADER)))
+    if magic != MAGIC or version not in (1, VERSION):
+        f.close()
+        raise ValueError(f'{path} is not a sensor recording')
+
+    def records():
+        buf = bytearray(RECORD_SIZE)
+        try:
+            while f.readinto(buf) == RECORD_SIZE:
+                delta, code = struct.unpack(RECORD, buf)
+                if delta == GAP and version > 1:
+                    if f.readinto(buf) != RECORD_SIZE:
+                        break
+                    delta = struct.unpack(GAP_RECORD, buf)[0]
+                yield delta, None if code == ERROR else code / scale
+        finally:
+            f.close()
+
+    return epoch, records()
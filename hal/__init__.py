@@ -0,0 +1,134 @@
+import sys
+
+# Hardware backend, 'device' for the Pico or 'sim' for simulated hardware on CPython
+BACKEND = None
+
+# Port the webserver listens on, unprivileged when simulated
+HTTP_PORT = 80
+
+# Set while run_virtual drives asyncio from the virtual clock
+_virtual = False
+
+
+def select(backend=None, speed=1):
+    """
+    Select the hardware backend. Must run before anything that imports machine,
+    utime, network or ntptime, and only the first call has an effect.
+
+    The simulated backend puts hal/sim ahead on the import path, so those imports
+    resolve to simulated modules: Pin, I2C (with an HD44780 LCD on the
+    PCF8574 address), SPI, WLAN, NTP and a virtual utime clock. asyncio sleeps
+    are scaled to the same clock.
+
+    :param backend: 'device' or 'sim', by default 'device' on MicroPython and 'sim' elsewhere
+    :param speed: Virtual seconds per real second when simulated, 0 for a manual
+        clock that only moves on sleep or utime.advance
+    :return: The selected backend
+    """
+    global BACKEND, HTTP_PORT
+
+    # Already selected, e.g. by a script that imports main
+    if BACKEND is not None:
+        return BACKEND
+
+    if backend is None:
+        backend = 'device' if sys.implementation.name == 'micropython' else 'sim'
+    if backend not in ('device', 'sim'):
+        raise ValueError(f'Unknown hardware backend {backend}')
+    BACKEND = backend
+
+    if backend == 'sim':
+        root = '/'.join(__file__.split('/')[:-2]) or '.'
+        sys.path.insert(0, root + '/hal/sim')
+        # The filters import matrix as a top level module
+        sys.path.append(root + '/utils')
+        HTTP_PORT = 8080
+
+        import utime
+        utime.set_speed(speed)
+        _patch_asyncio(utime)
+        _patch_gc()
+
+    return backend
+
+
+def _patch_asyncio(utime):
+    # Scale sleeps to the virtual clock and add the MicroPython sleep_ms
+    import asyncio
+    sleep = asyncio.sleep
+
+    async def scaled_sleep(delay, result=None):
+        if _virtual:
+            # The event loop itself runs on the virtual clock
+            await sleep(delay)
+        else:
+            await sleep(utime.advance_sleep(delay))
+        return result
+
+    def sleep_ms(ms):
+        return scaled_sleep(ms / 1000)
+
+    asyncio.sleep = scaled_sleep
+    asyncio.sleep_ms = sleep_ms
+
+
+def run_virtual(main):
+    """
+    Run a coroutine to completion on an event loop timed by the manual virtual
+    clock. Whenever every task is asleep the clock jumps to the earliest
+    wake-up, so tasks run exactly on time however slow the host, and a
+    simulation runs as fast as it computes. Blocking sleeps, like the
+    bit-banged protocols' delays, still move the clock as they would hold
+    the Pico. Needs select('sim', speed=0).
+
+    :param main: Coroutine to run
+    :return: Its result
+    """
+    global _virtual
+    import asyncio
+    import selectors
+    import utime
+
+    if BACKEND != 'sim' or utime.get_speed():
+        raise RuntimeError('run_virtual needs the simulated backend on a manual clock, speed=0')
+
+    class Selector(selectors.DefaultSelector):
+        def select(self, timeout=None):
+            events = super().select(0)
+            if not events:
+                if timeout is None:
+                    raise RuntimeError('Every task is waiting with no timer to wake it')
+                utime.advance(timeout * 1000)
+            return events
+
+    class Loop(asyncio.SelectorEventLoop):
+        def time(self):
+            return utime.virtual_time()
+
+    loop = Loop(Selector())
+    asyncio.set_event_loop(loop)
+    _virtual = True
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        # Like asyncio.run, cancel the tasks left behind and let them finish
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        _virtual = False
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _patch_gc():
+    # Nominal free heap of a Pico W running the server
+    import gc
+    if not hasattr(gc, 'mem_free'):
+        gc.mem_free = lambda: 150 * 1024
+        gc.mem_alloc = lambda: 80 * 1024
+
+        # A full CPython collection takes milliseconds, far more than on the
+        # Pico's small heap, so the per-tick collect only sweeps the youngest generation
+        collect = gc.collect
+        gc.collect = lambda generation=0: collect(generation)
@@ -0,0 +1,2 @@
+# Wifi connections for the simulated WLAN, which accepts any
+CONNECTIONS = [('simulated', '')]
@@ -0,0 +1,239 @@
+"""Simulated Pin, I2C and SPI with the MicroPython machine API.
+
+Peripherals are attached by address or CS pin. A MAX6675 stand-in answers on
+either hardware SPI or the bit-banged GPIO protocol, and an HD44780 behind a
+PCF8574 is always present at the LCD's I2C address.
+"""
+
+import utime
+
+# Pins by id, so a bus can tell which chip is selected
+_pins = {}
+
+# SPI devices (anything with readinto, like FakeSPI) by CS pin id
+_spi_devices = {}
+
+
+def attach_spi(cs, device):
+    """
+    Connect a device to the shared SPI (or bit-banged) bus behind CS pin cs.
+    :param cs: CS pin id
+    :param device: Object with readinto(buf), e.g. apparatus.max6675.FakeSPI
+    """
+    _spi_devices[cs] = device
+
+
+def attach_i2c(addr, device):
+    """
+    Connect a device answering writeto(buf) at an I2C address.
+    """
+    _i2c_devices[addr] = device
+
+
+def _selected():
+    # The attached device whose CS is low
+    for cs, device in _spi_devices.items():
+        pin = _pins.get(cs)
+        if pin is not None and not pin._value:
+            return pin
+    return None
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = 0
+        self._frame = 0     # Frame shifting out while this pin selects a device
+        self._bit = 0
+        _pins[id] = self
+        if value is not None:
+            self.value(value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, value=None):
+        if value is None:
+            if self.mode == Pin.IN:
+                # SO of the selected MAX6675, bit 15 first
+                cs = _selected()
+                if cs is not None:
+                    return (cs._frame >> (15 - cs._bit)) & 0x01 if cs._bit < 16 else 0
+            return self._value
+
+        value = 1 if value else 0
+        if self.id in _spi_devices and self._value and not value:
+            # CS falling edge latches the conversion into the frame
+            buf = bytearray(2)
+            _spi_devices[self.id].readinto(buf)
+            self._frame = (buf[0] << 8) | buf[1]
+            self._bit = 0
+        elif self._value and not value:
+            # Any other falling edge while a chip is selected clocks out the next bit
+            cs = _selected()
+            if cs is not None and cs is not self:
+                cs._bit += 1
+        self._value = value
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def high(self):
+        self.value(1)
+
+    def low(self):
+        self.value(0)
+
+
+class SPI:
+
+    def __init__(self, id, baudrate=1000000, polarity=0, phase=0, sck=None, mosi=None, miso=None, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.transactions = 0
+        self.bytes = 0
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def readinto(self, buf, write=0x00):
+        self.transactions += 1
+        self.bytes += len(buf)
+        cs = _selected()
+        if cs is None:
+            for i in range(len(buf)):
+                buf[i] = write
+            return
+        _spi_devices[cs.id].readinto(buf)
+
+    def read(self, nbytes, write=0x00):
+        buf = bytearray(nbytes)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def write(self, buf):
+        self.transactions += 1
+        self.bytes += len(buf)
+
+
+class HD44780:
+
+    def __init__(self, lines=2, columns=16):
+        """
+        HD44780 character LCD behind a PCF8574 I2C expander, decoding the bus
+        bytes into display memory.
+        """
+        self.lines = lines
+        self.columns = columns
+        self.ram = bytearray(b' ' * 128)
+        self.addr = 0
+        self.four_bit = False
+        self._nibble = None
+        self._last = 0
+
+    def writeto(self, buf):
+        # Data is latched on the falling edge of E
+        for byte in bytes(buf):
+            if self._last & 0x04 and not byte & 0x04:
+                self._latch(byte)
+            self._last = byte
+
+    def _latch(self, byte):
+        rs = byte & 0x01
+        nibble = byte >> 4
+        if not self.four_bit:
+            # 8-bit mode only sees the high nibble, during initialization
+            self._execute(nibble << 4, rs)
+            return
+        if self._nibble is None:
+            self._nibble = nibble
+            return
+        value = (self._nibble << 4) | nibble
+        self._nibble = None
+        self._execute(value, rs)
+
+    def _execute(self, value, rs):
+        if rs:
+            self.ram[self.addr] = value
+            self.addr = (self.addr + 1) & 0x7f
+        elif value == 0x01:
+            self.ram[:] = b' ' * 128
+            self.addr = 0
+        elif (value & 0xfe) == 0x02:
+            self.addr = 0
+        elif value & 0x80:
+            self.addr = value & 0x7f
+        elif (value & 0xe0) == 0x20:
+            self.four_bit = not value & 0x10
+
+    def text(self):
+        """
+        The characters on screen, one string per line.
+        """
+        starts = (0x00, 0x40, 0x14, 0x54)
+        return [
+            bytes(self.ram[starts[i]:starts[i] + self.columns]).decode()
+            for i in range(self.lines)
+        ]
+
+
+# The LCD on the PCF8574's default address
+_i2c_devices = {0x27: HD44780()}
+
+
+class I2C:
+
+    def __init__(self, id, scl=None, sda=None, freq=400000, **kwargs):
+        self.id = id
+        self.freq = freq
+        self.transactions = 0
+        self.bytes = 0
+
+    def scan(self):
+        return sorted(_i2c_devices)
+
+    def writeto(self, addr, buf, stop=True):
+        self.transactions += 1
+        self.bytes += len(buf)
+        device = _i2c_devices.get(addr)
+        if device is None:
+            raise OSError(19)   # ENODEV, nothing acknowledged the address
+        device.writeto(buf)
+        return 1
+
+    def lcd(self, addr=0x27):
+        """
+        The simulated LCD at an address.
+        """
+        return _i2c_devices[addr]
+
+
+def freq(hz=None):
+    return 125000000
+
+
+def reset():
+    raise SystemExit
+
+
+def unique_id():
+    return b'\xe6\x61\x41\x04\x03\x2f\x5b\x28'
+
+
+def idle():
+    utime.sleep_ms(1)
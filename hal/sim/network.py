@@ -0,0 +1,55 @@
+"""Simulated WLAN with the MicroPython network API, always connects."""
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+_hostname = 'PicoW'
+
+
+def hostname(name=None):
+    global _hostname
+    if name is None:
+        return _hostname
+    _hostname = name
+
+
+class WLAN:
+
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._status = STAT_IDLE
+        self._config = {'mac': b'\x28\xcd\xc1\x00\x00\x01', 'ssid': '', 'pm': 0}
+
+    def active(self, active=None):
+        if active is None:
+            return self._active
+        self._active = bool(active)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        self._config['ssid'] = ssid
+        self._status = STAT_GOT_IP
+
+    def disconnect(self):
+        self._status = STAT_IDLE
+
+    def status(self, param=None):
+        return self._status
+
+    def isconnected(self):
+        return self._status == STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
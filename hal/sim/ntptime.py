@@ -0,0 +1,15 @@
+"""Simulated NTP, sets the virtual clock to the host's wall clock."""
+
+import time as _time
+import utime
+
+host = "pool.ntp.org"
+timeout = 1
+
+
+def time():
+    return int(_time.time())
+
+
+def settime():
+    utime.set_time(time())
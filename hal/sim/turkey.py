@@ -0,0 +1,127 @@
+"""Lumped two-node thermal model of a turkey roasting in an oven, read through
+simulated MAX6675 probes on the virtual clock."""
+
+import math
+import random
+import utime
+from apparatus.max6675 import CAL_FACTOR, CAL_OFFSET
+
+
+class TurkeyModel:
+
+    def __init__(self, oven=163, start=4, room=21, weight=5.5, doors=(), stall=1.0):
+        """
+        Surface and core nodes heated by the oven air, all in Celsius and seconds:
+
+            dAir/dt  = (setpoint - Air) / tau, room temperature while the door is open
+            dSurf/dt = ks (Air - Surf) - ksc (Surf - Core) - evaporation
+            dCore/dt = kcs (Surf - Core)
+
+        Evaporative cooling switches on once the surface is hot and lasts until
+        the surface moisture is used up, holding the surface back and stalling
+        the core for a while. Defaults roast a 12 lb bird at 325F to 165F in
+        about 3 hours.
+
+        :param oven: Oven setpoint [C]
+        :param start: Starting temperature of the bird [C]
+        :param room: Kitchen temperature, where the air heads with the door open [C]
+        :param weight: Bird weight [kg], time constants scale with weight^(2/3)
+        :param doors: (start, duration) [sec] of each door opening
+        :param stall: Strength of the evaporative stall, 0 disables it
+        """
+        self.setpoint = oven
+        self.room = room
+        self.doors = doors
+        scale = (weight / 5.5) ** (2 / 3)
+        self.ks = 1 / (2520 * scale)        # Air to surface
+        self.ksc = 1 / (3360 * scale)       # Surface to core, on the surface
+        self.kcs = 1 / (5040 * scale)       # Surface to core, on the core
+        self.evaporation = 0.03 * stall     # Surface cooling with full moisture [C/sec]
+        self.latent = 300                   # Moisture budget [C of cooling]
+
+        self.t = 0                          # Time into the cook [sec]
+        self.air = oven                     # Preheated
+        self.surface = start
+        self.core = start
+        self.moisture = 1.0
+        self._last = None                   # ticks_ms the model was advanced to
+
+    def door_open(self):
+        for start, duration in self.doors:
+            if start <= self.t < start + duration:
+                return True
+        return False
+
+    def step(self, dt):
+        """
+        Advance the model by dt seconds, in explicit Euler steps of at most a second.
+        """
+        while dt > 0:
+            h = min(dt, 1)
+            dt -= h
+
+            if self.door_open():
+                self.air += (self.room - self.air) * h / 40
+            else:
+                # Element heats back to the setpoint
+                self.air += (self.setpoint - self.air) * h / 420
+
+            evaporation = self.evaporation * self.moisture / (1 + math.exp(-(self.surface - 55) / 3))
+            flow = self.surface - self.core
+            self.surface += h * (self.ks * (self.air - self.surface) - self.ksc * flow - evaporation)
+            self.core += h * self.kcs * flow
+            self.moisture = max(0, self.moisture - h * evaporation / self.latent)
+            self.t += h
+
+    def sync(self):
+        """
+        Advance the model to the virtual clock.
+        """
+        now = utime.ticks_ms()
+        if self._last is not None:
+            self.step(utime.ticks_diff(now, self._last) / 1000)
+        self._last = now
+
+    def temperature(self, depth=1.0):
+        """
+        Temperature between the surface (depth 0) and the core (depth 1) [C].
+        """
+        return self.surface + depth * (self.core - self.surface)
+
+
+class TurkeyProbe:
+
+    def __init__(self, model, depth=1.0, air=False, noise=0.25, seed=None):
+        """
+        MAX6675 on a thermocouple in the model, answering SPI reads. Attach it
+        to a CS pin with machine.attach_spi.
+
+        :param model: TurkeyModel
+        :param depth: Probe depth, 0 at the surface and 1 at the core
+        :param air: Measure the oven air instead of the bird
+        :param noise: Thermocouple noise (1-standard deviation) [C]
+        :param seed: Random seed for the noise
+        """
+        self.model = model
+        self.depth = depth
+        self.air = air
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.reads = 0
+
+    def celsius(self):
+        self.model.sync()
+        if self.air:
+            return self.model.air
+        return self.model.temperature(self.depth)
+
+    def readinto(self, buf, write=0x00):
+        self.reads += 1
+        reading = self.celsius() + self.random.gauss(0, self.noise)
+
+        # Quantized to 0.25C steps, such that the driver's calibration gives the reading back
+        value = int(round((reading - CAL_OFFSET) / CAL_FACTOR))
+        value = min(max(value, 0), 0x0fff)
+        frame = value << 3
+        buf[0] = (frame >> 8) & 0xff
+        buf[1] = frame & 0xff
@@ -0,0 +1,139 @@
+"""Virtual clock with the MicroPython utime API, for the simulated backend."""
+
+import time as _time
+
+try:
+    from time import monotonic as _monotonic
+    from calendar import timegm as _timegm
+except ImportError:
+    # MicroPython unix port
+    def _monotonic():
+        return _time.time_ns() / 1000000000
+
+    def _timegm(t):
+        return _time.mktime(t)
+
+# ticks_ms and ticks_us wrap like on the RP2040
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+_speed = 1                      # Virtual seconds per real second, 0 for a manual clock
+_origin = _monotonic()          # Real time when _offset was taken
+_offset = 0                     # Virtual time at _origin [ms]
+_epoch = _time.time()           # Wall clock at virtual time 0 [sec]
+
+
+def _now():
+    if _speed:
+        return _offset + (_monotonic() - _origin) * 1000 * _speed
+    return _offset
+
+
+def set_speed(speed):
+    """
+    Run the clock at speed virtual seconds per real second, or 0 to only move
+    it by sleeps and advance.
+    """
+    global _speed, _origin, _offset
+    _offset = _now()
+    _origin = _monotonic()
+    _speed = speed
+
+
+def get_speed():
+    return _speed
+
+
+def advance(ms):
+    """
+    Move a manual clock forward.
+    """
+    if _speed:
+        raise RuntimeError('advance needs a manual clock, set_speed(0)')
+    _advance(ms)
+
+
+def advance_sleep(seconds):
+    """
+    Real seconds to sleep for a virtual sleep, moving a manual clock instead.
+    """
+    if _speed:
+        return seconds / _speed
+    _advance(seconds * 1000)
+    return 0
+
+
+def virtual_time():
+    """
+    Virtual seconds, not wrapping, e.g. for an event loop's clock.
+    """
+    return _now() / 1000
+
+
+def _advance(ms):
+    global _offset
+    _offset += ms
+
+
+def set_time(seconds):
+    """
+    Set the wall clock, as ntptime.settime does.
+    """
+    global _epoch
+    _epoch = seconds - _now() / 1000
+
+
+def ticks_ms():
+    return int(_now()) & _TICKS_MAX
+
+
+def ticks_us():
+    return int(_now() * 1000) & _TICKS_MAX
+
+
+ticks_cpu = ticks_us
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def sleep(seconds):
+    seconds = advance_sleep(seconds)
+    # A real sleep costs more than the short delays of the bit-banged protocols
+    if seconds > 0.0001:
+        _time.sleep(seconds)
+
+
+def sleep_ms(ms):
+    sleep(ms / 1000)
+
+
+def sleep_us(us):
+    sleep(us / 1000000)
+
+
+def time():
+    return int(_epoch + _now() / 1000)
+
+
+def time_ns():
+    return int((_epoch + _now() / 1000) * 1000000000)
+
+
+def gmtime(seconds=None):
+    if seconds is None:
+        seconds = time()
+    return tuple(_time.gmtime(seconds)[:8])
+
+
+localtime = gmtime
+
+
+def mktime(t):
+    return _timegm(tuple(t[:6]) + (0, 0, 0))
@@ -1,5 +1,12 @@
+import hal
+
+# Real hardware on the Pico, simulated hardware anywhere else
+hal.select()
+
 import asyncio
+import utime
 from utils import clock
+from utils.statistics import P2Quantile
 from sensor import PicoThermometer
 from microdot.microdot import Response
 from microdot.microdot_asyncio import Microdot
@@ -10,7 +17,22 @@ from utils.connect import connect_to_network
 # sudo chmod a+rw /dev/ttyACM0
 
 # Server -------------------------------------------------------------------- #
-server = Microdot()
+# Request latency percentiles [ms] over the whole cook
+latency = [P2Quantile(p) for p in (0.5, 0.9, 0.99)]
+
+
+class TimedMicrodot(Microdot):
+    # Times every connection from reading the request to closing it, so the
+    # latency includes streaming the response body and the error and 404 paths
+    async def handle_request(self, reader, writer):
+        start = utime.ticks_us()
+        await super().handle_request(reader, writer)
+        elapsed = utime.ticks_diff(utime.ticks_us(), start) / 1000
+        for q in latency:
+            q.update(elapsed)
+
+
+server = TimedMicrodot()
 Response.default_content_type = 'text/html'
 
 with open('static/index.html', 'r') as f:
@@ -22,6 +44,14 @@ with open('static/index.html', 'r') as f:
 with open('static/script.js', 'r') as f:
     js_string = f.read()
 
+def query_flag(request, name):
+    # Set by ?name, ?name=1 or ?name=true, but not by ?name=0 or ?name=false
+    value = request.args.get(name)
+    if value is None:
+        return False
+    return value.lower() in ('', '1', 'true', 'yes', 'on')
+
+
 # Webserver routes
 @server.route('/')
 async def index(request):
@@ -44,10 +74,25 @@ async def api_current(request, methods = ['GET']):
     return Thermo.get_current_data()
 
 
+@server.route('/data/metrics')
+async def api_metrics(request, methods = ['GET']):
+    print('Client requested metrics')
+    metrics = Thermo.get_metrics()
+    metrics['latency_ms'] = {f'p{int(q.p * 100)}': q.quantile() for q in latency}
+    return metrics
+
+
+@server.route('/data/forecast')
+async def api_forecast(request, methods = ['GET']):
+    print('Client requested forecast')
+    return Thermo.get_forecast()
+
+
 @server.route('/data/stream')
 async def api_stream_all(request, methods = ['GET']):
     print('Client requested data stream')
-    return Thermo.get_data_stream()
+    smoothed = query_flag(request, 'smoothed')
+    return Thermo.get_data_stream(smoothed=smoothed)
 
 
 @server.route('/data/stream/<from_timestamp>', methods = ['GET'])
@@ -68,7 +113,8 @@ async def api_stream(request, from_timestamp):
     
     print(f'Client requested data stream since {timestamp_str} ({n_readings:.0f} readings)')
     
-    return Thermo.get_data_stream(from_timestamp)
+    smoothed = query_flag(request, 'smoothed')
+    return Thermo.get_data_stream(from_timestamp, smoothed=smoothed)
 
 async def main():
     
@@ -85,11 +131,12 @@ async def main():
     
     # Start the sensor reading task
     sensor_task = asyncio.create_task(Thermo.read_sensors())
-    server_task = asyncio.create_task(server.start_server("0.0.0.0", port=80))
+    display_task = asyncio.create_task(Thermo.refresh_display())
+    server_task = asyncio.create_task(server.start_server("0.0.0.0", port=hal.HTTP_PORT))
     
     print('Setting up webserver...')
     
-    await asyncio.gather(sensor_task, server_task)
+    await asyncio.gather(sensor_task, display_task, server_task)
 
 
 # --------------------------------------------------------------------------- #
@@ -1,19 +1,68 @@
 import gc
+from array import array
+import utime
 import asyncio
-from machine import Pin
+from machine import Pin, SPI
 from utils import clock
+from utils.config import load_config
 from utils.kalman import KalmanFilter
-from utils.ema import ExponentialMovingAverage
-from apparatus.max6675 import MAX6675
+from utils.kalman_ud import UDKalmanFilter
+from utils.smoother import FixedLagSmoother
+from utils.ema import ExponentialMovingAverage, ExponentialMovingAverageBank
+from utils.regression import RollingLinearFit
+from utils.statistics import RollingStats, RollingMedian, P2Quantile
+from utils.predictor import NewtonCoolingFit
+from utils.forecast import KalmanForecast
+from utils.scheduler import DeadlineTimer
+from utils.ringbuffer import SPSCRing
+from apparatus.max6675 import MAX6675, MAX6675SPI
+from apparatus.probes import ProbeRegistry
+from apparatus.recorder import SensorRecorder
 from apparatus.lcd import LCD
 
 # Initialize --------------------------------------------------------------- #
-# The Thermocouple sensor
-sensor = MAX6675(
-    sck = Pin(19, Pin.OUT), 
-    cs = Pin(20, Pin.OUT),
+# Tuned filter settings
+config = load_config()
+
+# The Thermocouple sensors, sharing SCK and SO with a CS line each
+if config['sensor_backend'] == 'spi':
+    # Hardware SPI, SCK and SO must be wired to the bus's SCK and MISO pins
+    spi = SPI(
+        config['spi_id'],
+        baudrate=1000000,
+        polarity=0,
+        phase=0,
+        sck=Pin(config['spi_sck']),
+        miso=Pin(config['spi_miso'])
+        )
+
+    def make_sensor(cs):
+        return MAX6675SPI(spi = spi, cs = Pin(cs, Pin.OUT))
+else:
+    # Bit-banged GPIO
+    sck = Pin(19, Pin.OUT)
     so = Pin(18, Pin.IN)
-    )
+
+    def make_sensor(cs):
+        return MAX6675(sck = sck, cs = Pin(cs, Pin.OUT), so = so)
+
+probes = ProbeRegistry()
+for name, cs in config['probes']:
+    probes.add(name, make_sensor(cs))
+
+# The first probe drives the main readout
+sensor = probes.sensors[0]
+
+# Record its raw readings for replaying the cook later
+if config['record']:
+    sensor = SensorRecorder(sensor, config['record'])
+    probes.sensors[0] = sensor
+
+# Record handed from core 1 to core 0: dt, raw, temperature, rate and EMA rate,
+# then the filter state x, its prediction x_prior, the smoother gain of the step
+# before (row major) and the upper triangle of P, so core 0 smooths and
+# forecasts from its own copy
+RECORD_WIDTH = 26
 
 # Webserver ----------------------------------------------------------------- #
 class PicoThermometer:
@@ -21,41 +70,162 @@ class PicoThermometer:
     heartbeat = 1       # Seconds between readings
     log_rate = 5        # Log to stack every nth reading
     target = 165        # Target temperature
+    eta = None          # Estimated minutes to target temperature
+    oven = None         # Fitted oven (asymptotic) temperature
     rate = 0            # Rate of temperature change
     stdev = 0           # Standard deviation of the last minute of data
     timestamp = ''      # Current timestamp
     temperature = 0     # Current temperature
     stack = []          # Data stack of readings tuple (timestamp and temperature)
+    smooth_stack = []   # Same as stack, with the last lag window smoothed
     stacklength = 2 * int(60 / log_rate)  # Rolling average over 2 minute of data    
     
     def __init__(self, netinfo) -> None:
         self.netinfo = netinfo
-        self.KF = KalmanFilter(dt=self.heartbeat, x0=68, x0_acc=0.25) # type: ignore
-        self.EMA = ExponentialMovingAverage(alpha=0.01)
+        Filter = UDKalmanFilter if config['filter'] == 'ud' else KalmanFilter
+        self.KF = Filter(
+            dt=self.heartbeat,
+            x0=68,
+            x0_acc=config['x0_acc'],
+            meas_acc=config['meas_acc']
+            ) # type: ignore
+        self.EMA = ExponentialMovingAverage(alpha=config['alpha'])
+        self.rates = ExponentialMovingAverageBank(config['rate_horizons'])
+        self.timer = DeadlineTimer(int(self.heartbeat * 1000))
+        self.sampler = None
+        if len(probes) > 1 or config['oversample']:
+            # Reads every probe as its conversions complete
+            self.sampler = probes
+        self.spread = RollingStats(int(60 / self.heartbeat))
+        self.temperature_quantiles = [P2Quantile(p) for p in (0.1, 0.5, 0.9)]
+        self.despike = None
+        if config['median_window'] > 1:
+            self.despike = RollingMedian(config['median_window'])
+        self.rate_fit = None
+        if config['rate_source'] == 'regression':
+            self.rate_fit = RollingLinearFit(config['rate_window'])
+        self.smoother = FixedLagSmoother(self.KF, lag=config['smoother_lag'])
+        self.predictor = NewtonCoolingFit(forget=config['eta_forget'])
+        self.forecast = KalmanForecast(
+            self.KF,
+            step=int(60 / self.heartbeat),
+            horizon=config['forecast_horizon'],
+            max_sigma=config['forecast_max_sigma']
+            )
+        self.forecast_timestamp = 0
+        # The other probes, a filter each, with their results in arrays by probe index
+        self.probe_filters = [None] + [
+            UDKalmanFilter(
+                dt=self.heartbeat,
+                x0=68,
+                x0_acc=config['x0_acc'],
+                meas_acc=config['meas_acc']
+                )
+            for _ in range(1, len(probes))
+            ]
+        self.probe_emas = [None] + [
+            ExponentialMovingAverage(alpha=config['alpha'])
+            for _ in range(1, len(probes))
+            ]
+        # None until a probe has a reading
+        self.probe_temperature = [None] * len(probes)
+        self.probe_rate = [None] * len(probes)
+        self.counter = 0        # Readings processed
+        self.last_ticks = 0     # ticks_ms of the last reading
+        self.elapsed = 0        # Seconds from the first reading to the last, for the fits
+        
+        # Readings published by the acquisition loop on core 1
+        self.ring = None
+        self.probe_ring = None
+        self.acquiring = False
+        if config['dual_core']:
+            self.ring = SPSCRing(capacity=16, width=RECORD_WIDTH)
+            self._record = array('f', [0] * RECORD_WIDTH)
+            # Core 0's copy of the filter state in the last record
+            self._x = [0, 0, 0]
+            self._P = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+            if len(probes) > 1:
+                # Every reading of the other probes: index, value, error bit
+                self.probe_ring = SPSCRing(capacity=32, width=3)
+                self._probe_record = array('f', [0] * 3)
 
     def update_target(self, target):
         self.target = target
+        self.update_eta()
+    
+    def update_eta(self):
+        # Time to target from the Newton-cooling fit, falling back to linear extrapolation
+        seconds = self.predictor.time_to_target(self.temperature, self.target)
+        if seconds is not None:
+            self.eta = seconds / 60
+        elif self.rate > 0:
+            self.eta = (self.target - self.temperature) / self.rate
+        else:
+            self.eta = None
+        self.oven = self.predictor.oven
      
     def get_current_data(self):
         data = {
             'heartbeat': self.heartbeat,
             'rate': self.rate,
+            'rates': {f'{tau:.0f}s': rate for tau, rate in zip(self.rates.taus, self.rates.ema)},
+            'stdev': self.stdev,
+            'target': self.target,
+            'eta': self.eta,
+            'oven': self.oven,
             'timestamp': self.timestamp,
-            'temperature': self.temperature
+            'temperature': self.temperature,
+            'probes': self.get_probes()
+        }
+        return data
+
+    def get_probes(self):
+        # Every probe's temperature and rate, by name, None before its first reading
+        return {
+            name: {'temperature': self.probe_temperature[i], 'rate': self.probe_rate[i]}
+            for i, name in enumerate(probes.names)
+        }
+
+    def get_metrics(self):
+        # Distribution of logged temperatures over the whole cook
+        data = {
+            'temperature': {
+                f'p{int(q.p * 100)}': q.quantile() for q in self.temperature_quantiles
+            },
+            'tick': self.timer.get_metrics()
+        }
+        if self.ring is not None:
+            data['core1'] = {'queued': len(self.ring), 'dropped': self.ring.dropped}
+            if self.probe_ring is not None:
+                data['core1']['probes_dropped'] = self.probe_ring.dropped
+        return data
+
+    def get_forecast(self):
+        # Forecast cone cached at the last logged reading, one point per minute,
+        # cut short where sigma passes max_sigma
+        data = {
+            'timestamp': clock.datetime_to_string(self.forecast_timestamp),
+            'step': 60,
+            'max_sigma': self.forecast.max_sigma,
+            'horizon': self.forecast.horizon,
+            'mean': self.forecast.mean,
+            'sigma': self.forecast.sigma
         }
         return data
 
-    def get_data_stream(self, from_time = 0):
+    def get_data_stream(self, from_time = 0, smoothed = False):
         
         assert isinstance(from_time, int), 'from_time must be an datetime epoch integer'
+        
+        stack = self.smooth_stack if smoothed else self.stack
             
         # If last timestamp is < from_time,return nothing, i.e. no timestamps will meet the criteria
-        if self.stack[-1][0] < from_time:
+        if stack[-1][0] < from_time:
             return 'Invalid request, from_timestamp is in the future.', 400
         
         # Create a generator to stream the data
         def readings_generator():
-            for time, temp in self.stack:
+            for time, temp in stack:
                 if time > from_time:
                     timestamp = clock.datetime_to_string(time)
                     yield f"[{timestamp}, {temp}]" + "\n"
@@ -64,79 +234,337 @@ class PicoThermometer:
         
         return readings_generator()
      
+    def get_display(self):
+        '''
+        Text for the LCD, temperature and rate on the first line and the IP on the second
+        '''
+        # Rate capped at 99F/min, rounded to integer if > 9, else 1 decimal place
+        if abs(self.rate) > 99:
+            prate = 99 * self.rate / abs(self.rate)
+            prate = f'{prate:+.0f}'
+        elif abs(self.rate) > 9:
+            prate = f'{self.rate:+.0f}'
+        else:
+            prate = f'{self.rate:+.1f}'
+
+        return (
+            f"{self.temperature:.1f}F {prate}/min\n" +
+            f"{self.netinfo['ip']}"
+        )
+
+    async def refresh_display(self, period = None):
+        '''
+        Redraw the LCD on its own schedule, decoupled from the sensor reads.
+        Only characters that changed are sent, so the display is never cleared,
+        and the writes yield between runs so requests are served in between.
+        '''
+        if period is None:
+            period = config['lcd_period']
+        await LCD.clear_async()
+        while True:
+            await LCD.update_async(self.get_display())
+            await asyncio.sleep(period)
+
     async def read_sensors(self, period = heartbeat, loop = True):
-        counter = 0
+        self.timer.period_ms = int(period * 1000)
+        
+        if self.ring is not None and loop:
+            # Read and filter on the second core, this loop only consumes the results
+            import _thread
+            self.acquiring = True
+            _thread.start_new_thread(self.acquire, ())
+        elif self.sampler is not None and loop:
+            # Read every conversion in its own task, averaged into each heartbeat
+            asyncio.create_task(self.sampler.run())
+        
         while True:
             
-            # Get temp reading & convert to Fahrenheit
-            measurement = sensor.read_fahrenheit()
-            
-            # Update Kalman filter
-            self.KF.update(measurement)
-            
-            # Update timestamp in Thermometer
-            self.timestamp = clock.get_datetime()
+            if self.ring is not None and loop:
+                self.drain()
+            else:
+                # Get temp reading & convert to Fahrenheit, with the time it was taken
+                sample = None if self.sampler is None else self.sampler.take()
+                measurement = None
+                if sample is not None:
+                    measurement, now, _ = sample
+                elif self.sampler is None or not loop:
+                    # No sampler task to race for the chip, read it directly
+                    value = sensor.read_fahrenheit()
+                    if not sensor.error():
+                        measurement = value
+                        now = utime.ticks_ms()
                 
-            # Update temperature state in Thermometer
-            self.temperature = self.KF.x[0]
+                # Nothing new, or an open thermocouple, leaves the filter as it was for this tick
+                if measurement is not None:
+                    # Real time since the previous reading
+                    dt = utime.ticks_diff(now, self.last_ticks) / 1000 if self.counter else self.heartbeat
+                    self.last_ticks = now
+                    
+                    # Reject thermocouple glitches with a rolling median
+                    raw = measurement
+                    if self.despike is not None:
+                        measurement = self.despike.update(measurement)
+                    
+                    # Update Kalman filter through the smoother
+                    self.smoother.update(measurement)
+                    
+                    # Instantaneous rate of change per minute
+                    inst_rate = self.KF.x[1] * (60 / self.heartbeat) # type: ignore
+                    
+                    self.process(dt, raw, self.KF.x[0], inst_rate, None)
             
-            # Calculate instantaneous rate of change per minute
-            inst_rate = self.KF.x[1] * (60 / self.heartbeat) # type: ignore
+            # The other probes on the bus
+            for i in range(1, len(probes)):
+                self.update_probe(i)
+
+            # If single reading requested, return
+            if not loop:
+                return            
+
+            # Garbage collect
+            gc.collect()
             
-            # Update rate of change per min state in Thermometer as Exp. Moving Average
-            self.rate = self.EMA.update(inst_rate)             
+            # Sleep until the next absolute tick, so work above doesn't stretch the period
+            await self.timer.wait()
 
-            # Log to stack every nth reading
-            counter += 1
-            if counter % self.log_rate == 0:
+    def update_probe(self, i):
+        '''
+        Filter the readings of probe i since the last heartbeat, if any
+        '''
+        sample = probes.take(i)
+        if sample is None:
+            return
+        kf = self.probe_filters[i]
+        kf.update(sample[0])
+        
+        # Rate of change per minute as an EMA of the filter velocity
+        inst_rate = kf.x[1] * (60 / self.heartbeat)
+        self.probe_temperature[i] = kf.x[0]
+        self.probe_rate[i] = self.probe_emas[i].update(inst_rate)
 
-                # Add to the data stack for web data
-                self.stack.append(
-                    (self.timestamp, self.temperature)
-                )
+    def filter_state(self):
+        '''
+        The Kalman state and covariance for the forecast, the filter's own or,
+        when core 1 runs the filter, core 0's copy from the last record
+        '''
+        if self.ring is None:
+            return self.KF.x, self.KF.P
+        return self._x, self._P
 
-                # Fixed length stack
-                if len(self.stack) > self.stacklength:
-                    self.stack.pop(0)
-                
-                # Garbage collection
-                mem_free = gc.mem_free() / 1024 # type: ignore
-                
-                # Print to console
-                msg = [
-                    f'Log rate ({self.log_rate:.0f}s)',
-                    f'{clock.datetime_to_string(self.timestamp)}',
-                    f'Temp: {self.temperature:.2f}F',
-                    f'Rate: {self.rate:+.1f}F/min',
-                    f'mem free {mem_free:.0f} kb'
-                ]
-                print(' '.join(msg))
+    def drain(self):
+        '''
+        Take everything core 1 published since the last heartbeat
+        '''
+        while self.ring.get(self._record):
+            self.receive(self._record)
+        
+        # The other probes' readings, into the registry for their filters on this core
+        if self.probe_ring is not None:
+            record = self._probe_record
+            while self.probe_ring.get(record):
+                probes.accumulate(None if record[2] else record[1], utime.ticks_ms(), int(record[0]))
 
-            # If single reading requested, return
-            if not loop:
-                return            
+    def receive(self, record):
+        '''
+        Take a record published by core 1: copy out the filter state, extend
+        the smoothing window and process the reading
+        '''
+        x = self._x
+        P = self._P
+        k = 20
+        for i in range(3):
+            x[i] = record[5 + i]
+            for j in range(i, 3):
+                P[i][j] = P[j][i] = record[k]
+                k += 1
+        x_prior = [record[8 + i] for i in range(3)]
+        C = [[record[11 + 3 * i + j] for j in range(3)] for i in range(3)]
+        self.smoother.append(x, x_prior, C)
+        
+        self.process(record[0], record[1], record[2], record[3], record[4])
 
-            # print to LCD
-            LCD.clear()
+    def acquire(self):
+        '''
+        Acquisition loop for the second core: reads every conversion of every
+        probe, as the only user of the bus. The first probe's readings are
+        filtered and smoothed at each heartbeat and published with the filter
+        state to the ring, the other probes' readings go to the probe ring as
+        they come. Blocking, with no asyncio and no locks: after starting,
+        core 0 only reads what comes through the rings.
+        '''
+        period = int(self.heartbeat * 1000)
+        record = array('f', [0] * RECORD_WIDTH)
+        probe_record = array('f', [0] * 3)
+        oversample = config['oversample'] or len(probes) > 1
+        last = len(probes) - 1
+        total = 0
+        count = 0
+        last_ticks = utime.ticks_ms()
+        deadline = utime.ticks_add(last_ticks, period)
+        
+        while self.acquiring:
+            # Sleep until the next conversion to finish, or the heartbeat
+            wait = utime.ticks_diff(deadline, utime.ticks_ms())
+            index = 0
+            if oversample:
+                # Past the heartbeat with nothing read yet, only a conversion is worth waiting for
+                index, ready_in = probes.next_due(last)
+                wait = ready_in if wait <= 0 else min(wait, ready_in)
+            if wait > 0:
+                utime.sleep_ms(wait)
             
-            # Printing stdev capped at 99F/min, rounded to integer if > 9, else 1 decimal place
-            if abs(self.rate) > 9:
-                prate = f'{self.rate:+.0f}'
-            elif abs(self.rate) > 99:
-                prate = 99 * self.rate / abs(self.rate)                
-                prate = f'{prate:+.0f}'
+            # An unfinished conversion would only return the last reading again
+            probe = probes.sensors[index]
+            if oversample:
+                due = probe.ready()
             else:
-                prate = f'{self.rate:+.1f}'
-                                    
-            msg = (
-                f"{self.temperature:.1f}F {prate}/min\n" +
-                f"{self.netinfo['ip']}"
+                due = utime.ticks_diff(utime.ticks_ms(), deadline) >= 0
+            if due:
+                last = index
+                value = probe.read_fahrenheit()
+                error = probe.error()
+                if index:
+                    probe_record[0] = index
+                    probe_record[1] = value
+                    probe_record[2] = error
+                    self.probe_ring.put(probe_record)
+                elif not error:
+                    total += value
+                    count += 1
+                elif not oversample:
+                    # Open thermocouple, wait a conversion rather than spin on it
+                    utime.sleep_ms(MAX6675.MEASUREMENT_PERIOD_MS)
+            
+            now = utime.ticks_ms()
+            if utime.ticks_diff(now, deadline) < 0 or not count:
+                continue
+            
+            # Next heartbeat on the same grid, dropping any that were missed
+            deadline = utime.ticks_add(deadline, period)
+            if utime.ticks_diff(now, deadline) >= 0:
+                deadline = utime.ticks_add(now, period)
+            
+            measurement = total / count
+            total = 0
+            count = 0
+            
+            record[0] = utime.ticks_diff(now, last_ticks) / 1000
+            last_ticks = now
+            record[1] = measurement
+            
+            if self.despike is not None:
+                measurement = self.despike.update(measurement)
+            
+            # Update Kalman filter through the smoother, which core 0 extends with the record
+            C = self.smoother.step(measurement)
+            x = self.KF.x
+            
+            inst_rate = x[1] * (60 / self.heartbeat)
+            record[2] = x[0]
+            record[3] = inst_rate
+            record[4] = self.EMA.update(inst_rate)
+            
+            x_prior = self.KF.x_prior
+            P = self.KF.P
+            k = 20
+            for i in range(3):
+                record[5 + i] = x[i]
+                record[8 + i] = x_prior[i]
+                for j in range(3):
+                    record[11 + 3 * i + j] = 0 if C is None else C[i][j]
+                for j in range(i, 3):
+                    record[k] = P[i][j]
+                    k += 1
+            self.ring.put(record)
+
+    def process(self, dt, raw, temperature, inst_rate, ema_rate):
+        '''
+        Everything downstream of the Kalman filter for one reading
+        
+        dt -- real time since the previous reading [sec]
+        raw -- reading before the spike filter [F]
+        temperature -- filtered temperature [F]
+        inst_rate -- filtered rate of change [F/min]
+        ema_rate -- EMA of inst_rate if already computed, else None
+        '''
+        # Update standard deviation of the last minute of raw readings
+        self.spread.update(raw)
+        self.stdev = self.spread.stdev()
+        
+        # Update timestamp in Thermometer
+        self.timestamp = clock.get_datetime()
+            
+        # Update temperature state in Thermometer
+        self.temperature = temperature
+        
+        # Update the multi-horizon rates with the real elapsed time
+        self.rates.update(inst_rate, dt)
+        
+        # Time into the cook of this reading for the fits, from the measured
+        # intervals so scheduling jitter doesn't skew the time axis
+        if self.counter:
+            self.elapsed += dt
+        
+        if self.rate_fit is None:
+            # Update rate of change per min state in Thermometer as Exp. Moving Average
+            self.rate = self.EMA.update(inst_rate) if ema_rate is None else ema_rate
+        else:
+            # Rate of change per min as the slope over the regression window
+            slope = self.rate_fit.update(self.elapsed, self.temperature)
+            self.rate = 0 if slope is None else slope * 60
+        
+        # Update the time-to-target fit and estimate once for all clients
+        self.predictor.update(self.elapsed, self.temperature)
+        self.update_eta()
+        
+        # The first probe is the one filtered above
+        self.probe_temperature[0] = self.temperature
+        self.probe_rate[0] = self.rate
+
+        # Log to stack every nth reading
+        self.counter += 1
+        if self.counter % self.log_rate == 0:
+
+            # Add to the data stack for web data
+            self.stack.append(
+                (self.timestamp, self.temperature)
             )
-                        
-            LCD.putstr(msg)
+
+            self.smooth_stack.append(
+                (self.timestamp, self.temperature)
+            )
+
+            for q in self.temperature_quantiles:
+                q.update(self.temperature)
+
+            # Fixed length stack
+            if len(self.stack) > self.stacklength:
+                self.stack.pop(0)
+                self.smooth_stack.pop(0)
             
-            # Garbage collect
-            gc.collect()
+            # Revise the logged readings still inside the smoothing window
+            smoothed = self.smoother.smooth()
+            k = len(smoothed) - 1
+            i = len(self.smooth_stack) - 1
+            while k >= 0 and i >= 0:
+                self.smooth_stack[i] = (self.smooth_stack[i][0], smoothed[k][0])
+                k -= self.log_rate
+                i -= 1
             
-            await asyncio.sleep(period)
-                
+            # Propagate the forecast cone once for all clients
+            self.forecast.update(*self.filter_state())
+            self.forecast_timestamp = self.timestamp
+            
+            # Garbage collection
+            mem_free = gc.mem_free() / 1024 # type: ignore
+            
+            # Print to console
+            msg = [
+                f'Log rate ({self.log_rate:.0f}s)',
+                f'{clock.datetime_to_string(self.timestamp)}',
+                f'Temp: {self.temperature:.2f}F',
+                f'Rate: {self.rate:+.1f}F/min',
+                f'late ticks {self.timer.late:.0f}',
+                f'mem free {mem_free:.0f} kb'
+            ]
+            print(' '.join(msg))
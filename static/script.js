@@ -41,10 +41,12 @@ function updatePlot() {
   // Fetch streaming data from /data/stream/<from_timestamp> endpoint with the format [[timestamp, temperature], ...]
   const current_request = fetch('/data/current').then(response => response.json());
   const stream_request = fetch('/data/stream/' + lastTimestampString).then(response => response.text());
+  // Fetch the forecast cone from /data/forecast endpoint with one mean and sigma per minute
+  const forecast_request = fetch('/data/forecast').then(response => response.json());
 
   // Process the fetched data
-  Promise.all([current_request, stream_request])
-    .then(([currentJSON, dataString]) => {
+  Promise.all([current_request, stream_request, forecast_request])
+    .then(([currentJSON, dataString, forecastJSON]) => {
       // Extract the current data from the fetched data and convert to float
       var currentTemperature = parseFloat(currentJSON.temperature);
       var rate = parseFloat(currentJSON.rate);
@@ -92,16 +94,26 @@ function updatePlot() {
         name: 'Actual Temperature',
       };
 
-      // Calculate forecasted timestamps and temperatures
+      // Forecast cone computed on the device, limited to the requested duration
+      var forecastStart = new Date(forecastJSON.timestamp);
       var forecastTimestamps = [];
       var forecastTemperatures = [];
+      var forecastUpper = [];
+      var forecastLower = [];
+
+      for (var i = 0; i < forecastJSON.mean.length && i <= forecastDuration; i++) {
+        forecastTimestamps.push(new Date(forecastStart.getTime() + i * forecastJSON.step * 1000));
+        forecastTemperatures.push(forecastJSON.mean[i]);
+        forecastUpper.push(forecastJSON.mean[i] + forecastJSON.sigma[i]);
+        forecastLower.push(forecastJSON.mean[i] - forecastJSON.sigma[i]);
+      }
+      var bandTimestamps = forecastTimestamps.slice();
 
-      for (var i = 0; i <= forecastDuration; i++) {
-        var forecastTimestamp = new Date(timestamps[timestamps.length - 1].getTime() + i * 60 * 1000);
-        var forecastTemperature = temperatures[temperatures.length - 1] + rate * i;
-
-        forecastTimestamps.push(forecastTimestamp);
-        forecastTemperatures.push(forecastTemperature);
+      // The device stops the cone where sigma passes max_sigma, carry on along the current rate without a band
+      var last = forecastTemperatures.length - 1;
+      for (var i = last + 1; last >= 0 && i <= forecastDuration; i++) {
+        forecastTimestamps.push(new Date(forecastStart.getTime() + i * forecastJSON.step * 1000));
+        forecastTemperatures.push(forecastTemperatures[last] + rate * (i - last) * forecastJSON.step / 60);
       }
 
       // Create the forecast trace with a dotted line
@@ -117,6 +129,32 @@ function updatePlot() {
         name: 'Forecasted Temperature',
       };
 
+      // Create the +/- 1 standard deviation band around the forecast
+      var forecastLowerTrace = {
+        x: bandTimestamps,
+        y: forecastLower,
+        type: 'scatter',
+        mode: 'lines',
+        line: {
+          width: 0,
+        },
+        showlegend: false,
+        hoverinfo: 'skip',
+      };
+
+      var forecastUpperTrace = {
+        x: bandTimestamps,
+        y: forecastUpper,
+        type: 'scatter',
+        mode: 'lines',
+        fill: 'tonexty',  // Fill down to the lower bound
+        fillcolor: 'rgba(255, 0, 0, 0.2)',
+        line: {
+          width: 0,
+        },
+        name: 'Forecast ± 1σ',
+      };
+
       var layout = {
         xaxis: {
           title: {
@@ -156,9 +194,13 @@ function updatePlot() {
         plot_bgcolor: 'rgba(0,0,0,0)',     // Transparent background color of the plot area
       };
 
-      // Calculate estimated time to completion
-      var TTC = (targetTemperature - currentTemperature) / rate;
-      var data = [trace, forecastTrace];
+      // Use the estimated time to completion from the device when it was computed for this target
+      if (currentJSON.eta !== null && currentJSON.eta !== undefined && currentJSON.target === targetTemperature) {
+        var TTC = parseFloat(currentJSON.eta);
+      } else {
+        var TTC = (targetTemperature - currentTemperature) / rate;
+      }
+      var data = [trace, forecastLowerTrace, forecastUpperTrace, forecastTrace];
 
       // Use Plotly to create or update the plot
       Plotly.newPlot('time-series-plot', data, layout);
@@ -0,0 +1,16 @@
+# Tests run on CPython against the simulated hardware backend in hal/sim.
+#
+# Run them with the pytest command from the repo root, `pytest tests`, rather
+# than `python -m pytest`, which would put the repo root (and its MicroPython
+# logging.py) ahead of the standard library.
+
+import sys
+
+# Append rather than prepend the repo root, so logging.py there does not
+# shadow the standard library module
+sys.path.append(__file__.rsplit('/', 2)[0])
+
+import hal
+
+# A manual clock, so sleeps return at once and time only moves when told to
+hal.select('sim', speed=0)
@@ -0,0 +1,202 @@
+import pytest
+import utime
+from machine import Pin, attach_spi
+from apparatus.max6675 import MAX6675, FakeSPI, CAL_OFFSET
+from apparatus.probes import ProbeRegistry
+from kalman import KalmanFilter
+from smoother import FixedLagSmoother
+import sensor
+
+CELSIUS = 100
+
+
+def fahrenheit(celsius):
+    return (celsius + CAL_OFFSET) * 9 / 5 + 32
+
+
+class CountingSensor:
+    # A MAX6675, counting reads and those made before a conversion was done,
+    # which only return the last value again
+    def __init__(self, sensor):
+        self.sensor = sensor
+        self.reads = 0
+        self.stale = 0
+
+    def ready(self):
+        return self.sensor.ready()
+
+    def ready_in_ms(self):
+        return self.sensor.ready_in_ms()
+
+    def error(self):
+        return self.sensor.error()
+
+    def read_fahrenheit(self):
+        self.reads += 1
+        if not self.sensor.ready():
+            self.stale += 1
+        return self.sensor.read_fahrenheit()
+
+
+def make_probe(cs, celsius):
+    device = FakeSPI(celsius=celsius)
+    attach_spi(cs, device)
+    chip = MAX6675(sck=Pin(cs + 100, Pin.OUT), cs=Pin(cs, Pin.OUT), so=Pin(cs + 200, Pin.IN))
+    return device, CountingSensor(chip)
+
+
+@pytest.fixture
+def dual_core(monkeypatch):
+    # Thermometers set up for core 1, on a registry of their own
+    monkeypatch.setitem(sensor.config, 'dual_core', True)
+    monkeypatch.setitem(sensor.config, 'median_window', 1)
+
+    def make(temperatures):
+        registry = ProbeRegistry()
+        probes = []
+        for i, celsius in enumerate(temperatures):
+            device, counting = make_probe(70 + i, celsius)
+            registry.add(f'probe{i}', counting)
+            probes.append((device, counting))
+        monkeypatch.setattr(sensor, 'probes', registry)
+        return sensor.PicoThermometer({'ip': 'test'}), probes
+
+    return make
+
+
+def run_acquire(thermo, monkeypatch, ms, each=None):
+    # Run the acquisition loop for ms on the manual clock. Core 0 is played at
+    # each of its sleeps, draining the rings, so nothing depends on how threads
+    # get scheduled
+    start = utime.ticks_ms()
+    sleep_ms = utime.sleep_ms
+
+    def sleep(wait):
+        sleep_ms(wait)
+        if each is not None:
+            each()
+        thermo.drain()
+        if utime.ticks_diff(utime.ticks_ms(), start) >= ms:
+            thermo.acquiring = False
+
+    monkeypatch.setattr(utime, 'sleep_ms', sleep)
+    thermo.acquiring = True
+    thermo.acquire()
+    thermo.drain()
+    return utime.ticks_diff(utime.ticks_ms(), start)
+
+
+@pytest.mark.parametrize('oversample', [True, False])
+def test_processes_every_heartbeat(dual_core, monkeypatch, oversample):
+    monkeypatch.setitem(sensor.config, 'oversample', oversample)
+    thermo, [(device, counting)] = dual_core([CELSIUS])
+
+    elapsed = run_acquire(thermo, monkeypatch, 8500)
+
+    assert thermo.counter == elapsed // 1000
+    assert thermo.elapsed == pytest.approx((thermo.counter - 1) * thermo.heartbeat)
+    assert thermo.spread.mean == pytest.approx(fahrenheit(CELSIUS))
+    assert counting.stale == 0
+    assert thermo.ring.dropped == 0
+
+
+def test_oversample_reads_each_conversion_once(dual_core, monkeypatch):
+    monkeypatch.setitem(sensor.config, 'oversample', True)
+    thermo, [(device, counting)] = dual_core([CELSIUS])
+
+    elapsed = run_acquire(thermo, monkeypatch, 8500)
+
+    assert counting.stale == 0
+    assert counting.reads <= elapsed / MAX6675.MEASUREMENT_PERIOD_MS + 1
+
+
+@pytest.mark.parametrize('oversample', [True, False])
+def test_open_thermocouple_backs_off(dual_core, monkeypatch, oversample):
+    monkeypatch.setitem(sensor.config, 'oversample', oversample)
+    thermo, [(device, counting)] = dual_core([CELSIUS])
+    device.set_temperature(CELSIUS, error=1)
+
+    elapsed = run_acquire(thermo, monkeypatch, 3000)
+
+    assert thermo.counter == 0
+    assert counting.reads >= 1
+    assert counting.reads <= elapsed / MAX6675.MEASUREMENT_PERIOD_MS + 1
+
+
+def test_forecast_from_core0_copy(dual_core, monkeypatch):
+    thermo, _ = dual_core([CELSIUS])
+    run_acquire(thermo, monkeypatch, 4500)
+
+    # The state published with the last record, not core 1's filter itself
+    x, P = thermo.filter_state()
+    KP = thermo.KF.P
+    assert x is not thermo.KF.x and P is not KP
+    for i in range(3):
+        assert x[i] == pytest.approx(thermo.KF.x[i], rel=1e-6, abs=1e-6)
+        for j in range(3):
+            assert P[i][j] == pytest.approx(KP[i][j], rel=1e-6, abs=1e-9)
+            assert P[i][j] == P[j][i]
+
+
+def test_smoother_fed_on_core1(dual_core, monkeypatch):
+    thermo, [(device, counting)] = dual_core([CELSIUS])
+    raws = []
+    process = thermo.process
+
+    def capture(dt, raw, *args):
+        raws.append(raw)
+        process(dt, raw, *args)
+
+    thermo.process = capture
+
+    # Readings that move, so smoothing revises them
+    start = utime.ticks_ms()
+
+    def heat():
+        t = utime.ticks_diff(utime.ticks_ms(), start) // 1000
+        device.set_temperature(CELSIUS + 0.5 * t + (0.75 if t % 2 else 0))
+
+    run_acquire(thermo, monkeypatch, 20500, heat)
+    assert thermo.ring.dropped == 0
+
+    # The same measurements through a smoother on one core
+    kf = type(thermo.KF)(
+        dt=thermo.heartbeat,
+        x0=68,
+        x0_acc=sensor.config['x0_acc'],
+        meas_acc=sensor.config['meas_acc']
+        )
+    reference = FixedLagSmoother(kf, lag=sensor.config['smoother_lag'])
+    for raw in raws:
+        reference.update(raw)
+
+    smoothed = thermo.smoother.smooth()
+    expected = reference.smooth()
+    assert len(raws) == 20
+    assert len(smoothed) == len(expected) == min(20, sensor.config['smoother_lag'])
+    assert smoothed != thermo.smoother.x
+    for a, b in zip(smoothed, expected):
+        assert a[0] == pytest.approx(b[0], abs=1e-3)
+
+
+def test_other_probes_filtered_on_core0(dual_core, monkeypatch):
+    thermo, [(_, first), (_, second)] = dual_core([CELSIUS, 40])
+
+    # As read_sensors does on core 0 at each heartbeat
+    def heartbeat():
+        if utime.ticks_diff(utime.ticks_ms(), start) >= 1000 * (thermo.counter + 1):
+            thermo.update_probe(1)
+
+    start = utime.ticks_ms()
+    elapsed = run_acquire(thermo, monkeypatch, 20500, heartbeat)
+
+    # Both chips read by core 1 at their conversions, none before, every
+    # reading of the second going through the probe ring
+    assert first.stale == 0 and second.stale == 0
+    assert second.reads >= elapsed / MAX6675.MEASUREMENT_PERIOD_MS - 2
+    assert thermo.probe_ring.dropped == 0
+    assert sensor.probes.samples == second.reads
+
+    probes = thermo.get_probes()
+    assert probes['probe0']['temperature'] == pytest.approx(fahrenheit(CELSIUS), abs=1)
+    assert probes['probe1']['temperature'] == pytest.approx(fahrenheit(40), abs=5)
@@ -0,0 +1,35 @@
+import pytest
+from kalman import KalmanFilter
+from forecast import KalmanForecast
+
+
+def tracked_filter(x0_acc):
+    # A filter settled on a steady 1.2F/min climb
+    kf = KalmanFilter(x0=40, x0_acc=x0_acc)
+    for t in range(600):
+        kf.update(40 + 0.02 * t)
+    return kf
+
+
+def test_cone_stops_at_max_sigma():
+    kf = tracked_filter(0.002)
+    full = KalmanForecast(kf, step=60, horizon=60)
+    full.update()
+    assert len(full.mean) == 61
+    assert full.sigma[-1] > 5
+
+    capped = KalmanForecast(kf, step=60, horizon=60, max_sigma=5)
+    capped.update()
+    n = len(capped.sigma)
+    assert 1 < n < 61
+    assert max(capped.sigma) <= 5
+    assert full.sigma[n] > 5
+    assert capped.mean == full.mean[:n]
+
+
+def test_default_tuning_keeps_the_current_point():
+    kf = tracked_filter(0.25)
+    forecast = KalmanForecast(kf, step=60, horizon=60, max_sigma=10)
+    forecast.update()
+    assert forecast.mean == [pytest.approx(kf.x[0])]
+    assert forecast.sigma[0] <= 10
@@ -0,0 +1,50 @@
+from machine import I2C, HD44780, attach_i2c
+from apparatus.i2c_lcd import I2cLcd
+
+ADDR = 0x26
+
+
+def make_lcd():
+    # A fresh simulated display on its own address
+    attach_i2c(ADDR, HD44780())
+    i2c = I2C(0)
+    lcd = I2cLcd(i2c, ADDR, 2, 16)
+    return lcd, i2c, i2c.lcd(ADDR)
+
+
+def count(i2c, write, *args):
+    i2c.transactions = 0
+    i2c.bytes = 0
+    write(*args)
+    return i2c.transactions, i2c.bytes
+
+
+def test_putstr_one_transfer_per_line():
+    lcd, i2c, screen = make_lcd()
+
+    # Two lines of characters and the cursor move between them
+    assert count(i2c, lcd.putstr, '172.4F +1.2/min\n192.168.100.123') == (3, 4 * 31)
+    assert screen.text() == ['172.4F +1.2/min ', '192.168.100.123 ']
+
+
+def test_putstr_wraps_full_line():
+    lcd, i2c, screen = make_lcd()
+    lcd.putstr('0123456789abcdefXY')
+    assert screen.text() == ['0123456789abcdef', 'XY              ']
+    assert (lcd.cursor_x, lcd.cursor_y) == (2, 1)
+
+
+def test_update_sends_only_changes():
+    lcd, i2c, screen = make_lcd()
+    lcd.update('172.4F +1.2/min\n192.168.100.123')
+
+    # One cursor move and one character
+    assert count(i2c, lcd.update, '172.5F +1.2/min\n192.168.100.123') == (2, 8)
+    assert screen.text() == ['172.5F +1.2/min ', '192.168.100.123 ']
+
+    # Nothing changed, nothing sent
+    assert count(i2c, lcd.update, '172.5F +1.2/min\n192.168.100.123') == (0, 0)
+
+    # Shorter text blanks the rest of the line
+    lcd.update('99.9F\nConnecting...')
+    assert screen.text() == ['99.9F           ', 'Connecting...   ']
@@ -0,0 +1,57 @@
+import matrix
+from kalman import KalmanFilter
+from smoother import FixedLagSmoother
+
+
+def close(a, b, tol=1e-9):
+    return abs(a - b) <= tol * max(1, abs(a), abs(b))
+
+
+def test_vector_update_matches_scalar():
+    # Two readings of the same temperature with variance r each are one
+    # reading of their mean with variance r / 2
+    r = 0.25
+    scalar = KalmanFilter(x0=40, x0_acc=0.05, meas_acc=(r / 2) ** 0.5)
+    vector = KalmanFilter(x0=40, x0_acc=0.05, meas_acc=r ** 0.5, H=[[1, 0, 0], [1, 0, 0]])
+    assert vector.R == [[r, 0], [0, r]]
+
+    for t in range(200):
+        a = 40 + 0.05 * t + (0.3 if t % 3 else -0.4)
+        b = 40 + 0.05 * t - (0.2 if t % 2 else -0.1)
+        scalar.update((a + b) / 2)
+        vector.update([a, b])
+
+    for i in range(3):
+        assert close(scalar.x[i], vector.x[i])
+        for j in range(3):
+            assert close(scalar.P[i][j], vector.P[i][j])
+
+
+def test_vector_update_with_correlated_noise():
+    # Readings whose noise is fully shared carry no more than one of them
+    r = 0.25
+    single = KalmanFilter(x0=40, x0_acc=0.05, meas_acc=r ** 0.5)
+    pair = KalmanFilter(x0=40, x0_acc=0.05, H=[[1, 0, 0], [1, 0, 0]], R=[[r, 0.99 * r], [0.99 * r, r]])
+
+    for t in range(50):
+        z = 40 + 0.1 * t
+        single.update(z)
+        pair.update([z, z])
+
+    assert abs(pair.P[0][0] - single.P[0][0]) < 0.01 * single.P[0][0]
+
+
+def test_smoother_gain_solves_without_inverse():
+    kf = KalmanFilter(x0=40, x0_acc=0.05, meas_acc=0.5)
+    smoother = FixedLagSmoother(kf, lag=10)
+    for t in range(20):
+        smoother.update(40 + 0.1 * t)
+
+    # C P_prior = P F^T for the last completed step
+    P_prev = [[1, 0.2, 0], [0.2, 1, 0.1], [0, 0.1, 1]]
+    C = smoother.gain(P_prev, kf.P_prior)
+    lhs = matrix.multiply(C, kf.P_prior)
+    rhs = matrix.multiply(P_prev, matrix.transpose(kf.F))
+    for i in range(3):
+        for j in range(3):
+            assert close(lhs[i][j], rhs[i][j], 1e-7)
@@ -0,0 +1,66 @@
+import math
+import random
+
+import pytest
+
+from kalman import KalmanFilter
+from kalman_ud import UDKalmanFilter
+
+np = pytest.importorskip('numpy')
+
+
+class Float32KalmanFilter:
+    # The standard equations of KalmanFilter with every operation rounded to
+    # float32, as MicroPython on the RP2040 computes them
+    def __init__(self, kf):
+        f = np.float32
+        self.F = np.array(kf.F, f)
+        self.Q = np.array(kf.Q, f)
+        self.H = np.array(kf.H, f)
+        self.R = np.array(kf.R, f)
+        self.I = np.eye(3, dtype=f)
+        self.x = np.array([[kf.x[0]], [kf.x[1]], [kf.x[2]]], f)
+        self.P = np.array(kf.P, f)
+
+    def update(self, z):
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T / S[0, 0]
+        self.x = self.x + K * (np.float32(z) - (self.H @ self.x)[0, 0])
+        self.P = (self.I - K @ self.H) @ self.P
+
+
+@pytest.mark.parametrize('x0_acc, meas_acc', [(0.25, 0.25), (0.05, 0.5), (0.001, 0.5)])
+def test_six_hour_cook_in_single_precision(x0_acc, meas_acc):
+    # Reference in double precision, the UD filter and the standard filter in float32
+    reference = KalmanFilter(x0=40, x0_acc=x0_acc, meas_acc=meas_acc)
+    ud = UDKalmanFilter(x0=40, x0_acc=x0_acc, meas_acc=meas_acc)
+    standard = Float32KalmanFilter(reference)
+
+    rng = random.Random(0)
+    ud_error = 0
+    standard_error = 0
+    standard_asymmetry = 0
+    for t in range(6 * 3600):
+        # Heating toward a 325F oven, read at 1 Hz with noise and 0.25C steps
+        T = 325 - (325 - 40) * math.exp(-t / 9000)
+        z = round((T + rng.gauss(0, 0.5)) / 0.45) * 0.45
+        reference.update(z)
+        ud.update(z)
+        standard.update(z)
+
+        assert min(ud.D) > 0
+        ud_error = max(ud_error, abs(ud.x[0] - reference.x[0]))
+        standard_error = max(standard_error, abs(float(standard.x[0, 0]) - reference.x[0]))
+        standard_asymmetry = max(standard_asymmetry, float(np.max(np.abs(standard.P - standard.P.T))))
+
+    # The UD filter tracks the double precision filter at least as closely as
+    # the standard one does in float32, whose covariance drifts from symmetric
+    assert ud_error < 1e-3
+    assert ud_error <= standard_error
+    assert standard_asymmetry > 0
+
+    # The composed UD covariance is symmetric by construction
+    P = ud.P
+    assert all(P[i][j] == P[j][i] for i in range(3) for j in range(3))
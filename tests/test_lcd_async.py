@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+import utime
+from apparatus.lcd_api import LcdApi
+from apparatus.i2c_lcd import I2cLcd, FakeI2C
+
+FRAMES = ['172.4F +1.2/min\n192.168.100.123', '99.9F -0.1/min\nConnecting...']
+
+
+@pytest.fixture
+def real_time():
+    # Event loop lag is measured on the real clock
+    utime.set_speed(1)
+    yield
+    utime.set_speed(0)
+
+
+def test_clear_and_home_wait_in_the_hal():
+    lcd = I2cLcd(FakeI2C(), 0x27, 2, 16)
+    for cmd in (LcdApi.LCD_CLR, LcdApi.LCD_HOME):
+        start = utime.ticks_ms()
+        lcd.hal_write_command(cmd)
+        assert utime.ticks_diff(utime.ticks_ms(), start) >= 5
+
+    start = utime.ticks_ms()
+    lcd.hal_write_command(LcdApi.LCD_ON_CTRL)
+    assert utime.ticks_diff(utime.ticks_ms(), start) == 0
+
+
+def max_lag(lcd, use_async, redraws=10):
+    # Largest delay past due of a task waking every millisecond, while the
+    # display is cleared and redrawn
+    async def ticker(lags, done):
+        while not done:
+            start = utime.ticks_us()
+            await asyncio.sleep_ms(1)
+            lags.append(utime.ticks_diff(utime.ticks_us(), start) - 1000)
+
+    async def redraw():
+        lags = []
+        done = []
+        task = asyncio.create_task(ticker(lags, done))
+        await asyncio.sleep_ms(0)
+        for i in range(redraws):
+            if use_async:
+                await lcd.clear_async()
+                await lcd.update_async(FRAMES[i % 2])
+            else:
+                lcd.clear()
+                lcd.update(FRAMES[i % 2])
+            await asyncio.sleep_ms(0)
+        done.append(True)
+        await task
+        return max(lags) / 1000
+
+    return asyncio.run(redraw())
+
+
+def test_async_redraw_bounds_event_loop_lag(real_time):
+    # A bus at 400 kHz, where a line of characters takes ~1.5 ms to send
+    lcd = I2cLcd(FakeI2C(byte_us=23), 0x27, 2, 16)
+
+    # Best of a few runs, so a stall of the host scheduler isn't counted
+    blocking = min(max_lag(lcd, use_async=False) for _ in range(3))
+    lag = min(max_lag(lcd, use_async=True) for _ in range(3))
+
+    # Blocking holds the loop for both 5 ms command delays and the redraw,
+    # the async driver for at most one line's transfer and scheduling slack
+    assert blocking > 10
+    assert lag < 6
+    assert lag < blocking / 2
@@ -0,0 +1,63 @@
+import matrix
+from matrix import Matrix
+
+
+def test_elementwise_through_transposed_views():
+    A = Matrix.from_list([[1, 2, 3], [4, 5, 6]])
+    B = Matrix.from_list([[1, 0], [0, 1], [2, 2]])
+    out = Matrix(2, 3)
+
+    assert matrix.add_into(out, A, B.T).to_list() == [[2, 2, 5], [4, 6, 8]]
+    assert matrix.subtract_into(out, A, B.T).to_list() == [[0, 2, 1], [4, 4, 4]]
+    assert matrix.scale_into(out, A, 2).to_list() == [[2, 4, 6], [8, 10, 12]]
+    assert Matrix(3, 2).copy_from(A.T).to_list() == [[1, 4], [2, 5], [3, 6]]
+
+
+def test_in_place_output():
+    A = Matrix.from_list([[1, 2], [3, 4]])
+    matrix.add_into(A, A, Matrix.identity(2))
+    assert A.to_list() == [[2, 2], [3, 5]]
+
+
+def test_transpose_view_is_cached():
+    A = Matrix(2, 3)
+    assert A.T is A.T
+    assert A.T.T is A
+
+    # Writes through the view land in the shared storage
+    A.T[2, 0] = 7
+    assert A[0, 2] == 7
+
+
+def test_matmul_into():
+    A = Matrix.from_list([[1, 2], [3, 4]])
+    out = Matrix(2, 2)
+    matrix.matmul_into(out, A, A.T)
+    assert out.to_list() == [[5, 11], [11, 25]]
+
+
+def test_cholesky_solve():
+    A = [[4, 2, 0.4], [2, 5, 1], [0.4, 1, 3]]
+    B = [[1, 0], [2, 1], [3, 0]]
+    L = Matrix.from_list(A, typecode='d')
+    X = Matrix.from_list(B, typecode='d')
+    matrix.cholesky_solve(matrix.cholesky(L), X)
+
+    AX = matrix.multiply(A, X.to_list())
+    for i in range(3):
+        for j in range(2):
+            assert abs(AX[i][j] - B[i][j]) < 1e-12
+
+
+def test_lu_solve_with_pivoting():
+    # A zero leading pivot forces a row swap
+    A = [[0, 2, 1], [1, 1, 0], [3, 0, 1]]
+    b = [3, 2, 4]
+    LU = Matrix.from_list(A, typecode='d')
+    pivots = [0] * 3
+    x = Matrix.from_list(b, typecode='d')
+    matrix.lu_solve(matrix.lu(LU, pivots), pivots, x, [0.0] * 3)
+
+    Ax = matrix.multiply(A, [x[i, 0] for i in range(3)])
+    for i in range(3):
+        assert abs(Ax[i] - b[i]) < 1e-12
@@ -0,0 +1,71 @@
+import pytest
+import utime
+from machine import Pin, SPI, attach_spi
+from apparatus.max6675 import MAX6675, MAX6675SPI, FakeSPI, CAL_OFFSET
+
+# CS pins not used by the thermometer itself
+CS = {'gpio': 40, 'spi': 41}
+
+
+def make_sensor(backend, device):
+    cs = CS[backend]
+    attach_spi(cs, device)
+    if backend == 'spi':
+        return MAX6675SPI(spi=SPI(0), cs=Pin(cs, Pin.OUT))
+    return MAX6675(sck=Pin(cs + 100, Pin.OUT), cs=Pin(cs, Pin.OUT), so=Pin(cs + 200, Pin.IN))
+
+
+def frames_read(sensor, device):
+    # The simulated CS pin also latches a frame for the bit-banged protocol,
+    # so over SPI count the bus transfers instead
+    if isinstance(sensor, MAX6675SPI):
+        return sensor._spi.transactions
+    return device.reads
+
+
+def wait_conversion():
+    utime.advance(MAX6675.MEASUREMENT_PERIOD_MS + 1)
+
+
+@pytest.mark.parametrize('backend', ['gpio', 'spi'])
+def test_reads_frame(backend):
+    device = FakeSPI(celsius=100)
+    sensor = make_sensor(backend, device)
+    wait_conversion()
+
+    assert sensor.read_celsius() == 100 + CAL_OFFSET
+    assert sensor.read_fahrenheit() == pytest.approx((100 + CAL_OFFSET) * 9 / 5 + 32)
+    assert sensor.error() == 0
+    assert frames_read(sensor, device) == 1
+
+
+@pytest.mark.parametrize('backend', ['gpio', 'spi'])
+def test_last_value_until_conversion_done(backend):
+    device = FakeSPI(celsius=60)
+    sensor = make_sensor(backend, device)
+    wait_conversion()
+    assert sensor.read_celsius() == 60 + CAL_OFFSET
+
+    device.set_temperature(70)
+    assert not sensor.ready()
+    assert sensor.ready_in_ms() > 0
+    assert sensor.read_celsius() == 60 + CAL_OFFSET
+    assert frames_read(sensor, device) == 1
+
+    utime.advance(sensor.ready_in_ms())
+    assert sensor.ready()
+    assert sensor.read_celsius() == 70 + CAL_OFFSET
+
+
+@pytest.mark.parametrize('backend', ['gpio', 'spi'])
+def test_open_thermocouple(backend):
+    device = FakeSPI(celsius=25, error=1)
+    sensor = make_sensor(backend, device)
+    wait_conversion()
+    sensor.read_celsius()
+    assert sensor.error() == 1
+
+    device.set_temperature(25)
+    wait_conversion()
+    sensor.read_celsius()
+    assert sensor.error() == 0
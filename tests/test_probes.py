@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+import utime
+import hal
+from machine import Pin, attach_spi
+import sensor
+from apparatus.max6675 import MAX6675, FakeSPI, CAL_OFFSET
+from apparatus.probes import ProbeRegistry
+
+
+class ReadLog:
+    # A probe's MAX6675, logging when it's read and whether the conversion was done
+    def __init__(self, sensor, log, index):
+        self.sensor = sensor
+        self.log = log
+        self.index = index
+
+    def ready(self):
+        return self.sensor.ready()
+
+    def ready_in_ms(self):
+        return self.sensor.ready_in_ms()
+
+    def error(self):
+        return self.sensor.error()
+
+    def read_fahrenheit(self):
+        self.log.append((self.index, utime.ticks_ms(), self.sensor.ready()))
+        return self.sensor.read_fahrenheit()
+
+
+def bus_registry(temperatures, log):
+    # Probes on their own CS pins, sharing nothing with the thermometer's
+    registry = ProbeRegistry()
+    for i, celsius in enumerate(temperatures):
+        cs = 60 + i
+        attach_spi(cs, FakeSPI(celsius=celsius))
+        chip = MAX6675(sck=Pin(cs + 100, Pin.OUT), cs=Pin(cs, Pin.OUT), so=Pin(cs + 200, Pin.IN))
+        registry.add(f'probe{i}', ReadLog(chip, log, i))
+    return registry
+
+
+def run_for(registry, seconds):
+    async def main():
+        task = asyncio.create_task(registry.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+
+    hal.run_virtual(main())
+
+
+@pytest.mark.parametrize('n', [1, 2, 3])
+def test_run_reads_each_conversion_once(n):
+    log = []
+    registry = bus_registry([60 + 10 * i for i in range(n)], log)
+    seconds = 10
+    run_for(registry, seconds)
+
+    # Never before a conversion is done
+    assert all(ready for _, _, ready in log)
+
+    # About once per conversion each, none starved
+    expected = seconds * 1000 / MAX6675.MEASUREMENT_PERIOD_MS
+    for i in range(n):
+        reads = [ticks for index, ticks, _ in log if index == i]
+        assert expected * 0.9 <= len(reads) <= expected + 1
+        gaps = [utime.ticks_diff(b, a) for a, b in zip(reads, reads[1:])]
+        assert min(gaps) > MAX6675.MEASUREMENT_PERIOD_MS
+        assert max(gaps) < 2 * MAX6675.MEASUREMENT_PERIOD_MS
+
+
+def test_run_goes_round_robin():
+    log = []
+    registry = bus_registry([60, 70, 80], log)
+    run_for(registry, 5)
+
+    # Chips started together come round in turn
+    order = [index for index, _, _ in log]
+    for k in range(0, len(order) - 2, 3):
+        assert sorted(order[k:k + 3]) == [0, 1, 2]
+
+
+def test_run_averages_per_probe():
+    log = []
+    registry = bus_registry([60, 70], log)
+    run_for(registry, 2)
+
+    for i, celsius in enumerate([60, 70]):
+        value, ticks, count = registry.take(i)
+        assert value == pytest.approx((celsius + CAL_OFFSET) * 9 / 5 + 32)
+        assert count == sum(1 for index, _, _ in log if index == i)
+        assert registry.take(i) is None
+
+
+@pytest.fixture
+def thermometer(monkeypatch):
+    # A thermometer with a second probe, fed through its registry by hand
+    registry = ProbeRegistry()
+    registry.add('meat', sensor.sensor)
+    registry.add('oven', None)
+    monkeypatch.setattr(sensor, 'probes', registry)
+    return sensor.PicoThermometer({'ip': 'test'}), registry
+
+
+def test_no_data_until_first_reading(thermometer):
+    thermo, registry = thermometer
+
+    assert thermo.get_probes() == {
+        'meat': {'temperature': None, 'rate': None},
+        'oven': {'temperature': None, 'rate': None},
+    }
+
+    # A heartbeat without a reading leaves the probe empty
+    thermo.update_probe(1)
+    assert thermo.get_probes()['oven'] == {'temperature': None, 'rate': None}
+
+
+def test_rate_seeded_from_first_reading(thermometer):
+    thermo, registry = thermometer
+    alpha = sensor.config['alpha']
+    kf = thermo.probe_filters[1]
+
+    registry.accumulate(300, utime.ticks_ms(), 1)
+    thermo.update_probe(1)
+    first = kf.x[1] * (60 / thermo.heartbeat)
+    assert thermo.probe_temperature[1] == kf.x[0]
+    assert thermo.probe_rate[1] == pytest.approx(first)
+
+    registry.accumulate(300, utime.ticks_ms(), 1)
+    thermo.update_probe(1)
+    second = kf.x[1] * (60 / thermo.heartbeat)
+    assert thermo.probe_rate[1] == pytest.approx(alpha * second + (1 - alpha) * first)
+
+
+def test_first_probe_set_by_process(thermometer):
+    thermo, registry = thermometer
+
+    thermo.process(thermo.heartbeat, 150, 150, 1.5, 1.5)
+    assert thermo.get_probes()['meat'] == {'temperature': 150, 'rate': 1.5}
+
+    # Reading the probes doesn't change them
+    thermo.temperature = 160
+    thermo.rate = 2
+    assert thermo.get_probes()['meat'] == {'temperature': 150, 'rate': 1.5}
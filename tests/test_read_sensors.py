@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+import utime
+import hal
+from machine import attach_spi
+from apparatus.max6675 import FakeSPI
+import sensor
+
+
+class ReadLog:
+    # The thermometer's MAX6675, logging whether each read found its conversion done
+    def __init__(self, sensor):
+        self.sensor = sensor
+        self.reads = []
+
+    def ready(self):
+        return self.sensor.ready()
+
+    def ready_in_ms(self):
+        return self.sensor.ready_in_ms()
+
+    def error(self):
+        return self.sensor.error()
+
+    def read_fahrenheit(self):
+        self.reads.append(self.sensor.ready())
+        return self.sensor.read_fahrenheit()
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    # A fresh device behind the first probe, read through the log by the
+    # heartbeat and the sampler alike
+    device = FakeSPI(celsius=60)
+    attach_spi(sensor.config['probes'][0][1], device)
+    log = ReadLog(sensor.sensor)
+    monkeypatch.setattr(sensor, 'sensor', log)
+    chip = sensor.probes.sensors[0]
+    sensor.probes.sensors[0] = log
+    # Readings left in the shared registry by another test
+    sensor.probes.take(0)
+    yield device, log
+    sensor.probes.sensors[0] = chip
+
+
+def run_for(thermo, seconds):
+    async def main():
+        task = asyncio.create_task(thermo.read_sensors())
+        await asyncio.sleep(seconds)
+        task.cancel()
+
+    hal.run_virtual(main())
+
+
+def test_heartbeat_leaves_the_chip_to_the_sampler(probe, monkeypatch):
+    device, log = probe
+    monkeypatch.setitem(sensor.config, 'oversample', True)
+    thermo = sensor.PicoThermometer({'ip': 'test'})
+
+    run_for(thermo, 10.5)
+
+    assert all(log.reads)
+    # The first heartbeat comes before any conversion is done and is skipped
+    assert thermo.counter == 10
+    assert thermo.temperature == pytest.approx(sensor.sensor.read_fahrenheit(), abs=1)
+
+
+def test_open_thermocouple_holds_the_filter(probe, monkeypatch):
+    device, log = probe
+    monkeypatch.setitem(sensor.config, 'oversample', True)
+    device.set_temperature(60, error=1)
+    thermo = sensor.PicoThermometer({'ip': 'test'})
+    x = list(thermo.KF.x)
+
+    run_for(thermo, 5.5)
+
+    assert log.reads
+    assert thermo.counter == 0
+    assert list(thermo.KF.x) == x
+
+
+@pytest.mark.parametrize('error, processed', [(0, 1), (1, 0)])
+def test_direct_read_checks_the_error_bit(probe, monkeypatch, error, processed):
+    device, log = probe
+    monkeypatch.setitem(sensor.config, 'oversample', False)
+    device.set_temperature(60, error=error)
+    utime.advance(300)
+    thermo = sensor.PicoThermometer({'ip': 'test'})
+
+    try:
+        thermo.read_sensors(loop=False).send(None)
+    except StopIteration:
+        pass
+
+    assert len(log.reads) == 1
+    assert thermo.counter == processed
@@ -0,0 +1,111 @@
+import os
+import struct
+
+import pytest
+import utime
+from apparatus.recorder import SensorRecorder, read_recording, HEADER, RECORD_SIZE
+
+HEADER_SIZE = struct.calcsize(HEADER)
+
+
+class StubSensor:
+    # Answers with a set reading, like a MAX6675 whose conversion is always done
+    def __init__(self, fahrenheit=150.0, error=0):
+        self.fahrenheit = fahrenheit
+        self._error = error
+
+    def read_fahrenheit(self):
+        return self.fahrenheit
+
+    def ready(self):
+        return True
+
+    def ready_in_ms(self):
+        return 0
+
+    def error(self):
+        return self._error
+
+
+def test_existing_file_kept_until_first_write(tmp_path):
+    path = str(tmp_path / 'cook.bin')
+    with open(path, 'wb') as f:
+        f.write(b'previous cook')
+
+    recorder = SensorRecorder(StubSensor(), path)
+    with open(path, 'rb') as f:
+        assert f.read() == b'previous cook'
+
+    recorder.flush()
+    with open(path, 'rb') as f:
+        assert f.read() == b'previous cook'
+
+    recorder.read_fahrenheit()
+    recorder.flush()
+    assert os.path.getsize(path) == HEADER_SIZE + RECORD_SIZE
+
+
+def test_flushes_when_full(tmp_path):
+    path = str(tmp_path / 'cook.bin')
+    recorder = SensorRecorder(StubSensor(), path, buffer_records=4, flush_ms=60000)
+
+    for _ in range(3):
+        recorder.read_fahrenheit()
+    assert not os.path.exists(path)
+
+    recorder.read_fahrenheit()
+    assert os.path.getsize(path) == HEADER_SIZE + 4 * RECORD_SIZE
+
+
+def test_flushes_on_timer(tmp_path):
+    path = str(tmp_path / 'cook.bin')
+    recorder = SensorRecorder(StubSensor(), path, buffer_records=128, flush_ms=1000)
+
+    recorder.read_fahrenheit()
+    utime.advance(500)
+    recorder.read_fahrenheit()
+    assert not os.path.exists(path)
+
+    utime.advance(500)
+    recorder.read_fahrenheit()
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * RECORD_SIZE
+
+    # The timer restarts at each write
+    utime.advance(999)
+    recorder.read_fahrenheit()
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * RECORD_SIZE
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'cook.bin')
+    sensor = StubSensor()
+    recorder = SensorRecorder(sensor, path)
+    epoch = utime.time()
+
+    for value, error in ((150.0, 0), (150.5, 0), (0.0, 1), (151.0, 0)):
+        utime.advance(220)
+        sensor.fahrenheit = value
+        sensor._error = error
+        recorder.read_fahrenheit()
+    recorder.flush()
+
+    start, records = read_recording(path)
+    assert start == epoch
+    assert list(records) == [(220, 150.0), (220, 150.5), (220, None), (220, 151.0)]
+
+
+@pytest.mark.parametrize('buffer_records', [2, 3, 128])
+def test_long_gap_kept(tmp_path, buffer_records):
+    # A stall longer than the 16 bit delta, at every place in the buffer
+    path = str(tmp_path / 'cook.bin')
+    recorder = SensorRecorder(StubSensor(), path, buffer_records=buffer_records)
+
+    gaps = [220, 90000, 220, 70000, 65535, 220]
+    for gap in gaps:
+        utime.advance(gap)
+        recorder.read_fahrenheit()
+    recorder.flush()
+
+    _, records = read_recording(path)
+    assert [delta for delta, _ in records] == gaps
+    assert os.path.getsize(path) == HEADER_SIZE + (len(gaps) + 3) * RECORD_SIZE
@@ -0,0 +1,29 @@
+import random
+
+import pytest
+from utils.statistics import P2Quantile
+
+
+@pytest.mark.parametrize('p, expected', [(0.1, 1), (0.5, 3), (0.9, 5)])
+def test_five_values_are_exact(p, expected):
+    q = P2Quantile(p)
+    for x in (4, 1, 5, 3, 2):
+        q.update(x)
+    assert q.quantile() == expected
+
+
+def test_fewer_than_five_values():
+    q = P2Quantile(0.9)
+    assert q.quantile() is None
+    for x in (3, 1, 2):
+        q.update(x)
+    assert q.quantile() == 3
+
+
+@pytest.mark.parametrize('p', [0.1, 0.5, 0.9])
+def test_converges_on_uniform_values(p):
+    rng = random.Random(1)
+    q = P2Quantile(p)
+    for _ in range(10000):
+        q.update(rng.random())
+    assert q.quantile() == pytest.approx(p, abs=0.02)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+import utime
+import hal
+from utils.scheduler import DeadlineTimer
+
+
+def test_concurrent_sleeps_overlap():
+    # Two tasks asleep at once take as long as the longer one, not their sum
+    async def main():
+        start = utime.ticks_ms()
+        await asyncio.gather(asyncio.sleep(2), asyncio.sleep_ms(500), asyncio.sleep(1))
+        return utime.ticks_diff(utime.ticks_ms(), start)
+
+    assert hal.run_virtual(main()) == 2000
+
+
+def test_deadline_timer_never_late():
+    # However long the host takes, the heartbeat wakes on its virtual deadline
+    async def main():
+        timer = DeadlineTimer(1000)
+        start = utime.ticks_ms()
+        for _ in range(100):
+            # Work that holds the loop, as a blocking read does on the Pico
+            utime.sleep_ms(30)
+            await timer.wait()
+        return timer, utime.ticks_diff(utime.ticks_ms(), start)
+
+    timer, elapsed = hal.run_virtual(main())
+    assert timer.late == 0 and timer.skipped == 0
+    assert timer.max_lateness == 0
+    assert elapsed == 30 + 100 * 1000
+
+
+def test_leftover_tasks_cancelled():
+    cancelled = []
+
+    async def forever():
+        try:
+            while True:
+                await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        asyncio.create_task(forever())
+        await asyncio.sleep(10)
+
+    hal.run_virtual(main())
+    assert cancelled == [True]
+
+
+def test_needs_manual_clock():
+    utime.set_speed(1)
+    try:
+        coro = asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            hal.run_virtual(coro)
+        coro.close()
+    finally:
+        utime.set_speed(0)
@@ -0,0 +1,382 @@
+# Microbenchmarks of the per-tick and per-request hot paths.
+#
+# Each benchmark is timed over enough calls to fill a round, keeping the
+# fastest of several rounds, and its allocations are measured separately.
+# The results are written as one JSON document, so runs can be kept and
+# compared across commits. Runs on CPython and on the MicroPython unix port,
+# against the simulated hardware backend.
+#
+# On MicroPython, allocation is the growth of gc.mem_alloc() per call with the
+# collector off, in the same heap bytes the Pico runs out of. CPython has no
+# such counter, so there it is the peak traced by tracemalloc above the heap
+# at the start of each call. The two are not comparable with each other.
+#
+# Usage:
+#   python tools/bench.py -o before.json
+#   micropython tools/bench.py --filter kalman --rounds 9 -o after.json
+#   python tools/bench.py --compare before.json after.json
+
+import gc
+import json
+import sys
+
+# Append rather than prepend the repo root, so the MicroPython logging.py
+# there does not shadow the standard library module
+sys.path.append((__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/..')
+
+import hal
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:
+    from time import perf_counter_ns
+
+    def ticks_us():
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(end, start):
+        return end - start
+
+USAGE = ('usage: bench.py [--filter TEXT] [--rounds N] [--round-ms MS] [-o FILE]\n'
+         '       bench.py --compare BEFORE AFTER')
+
+MAX_CALLS = 1 << 20     # Most calls timed in a round
+ALLOC_CALLS = 16        # Calls whose allocations are averaged
+
+BENCHMARKS = []
+
+
+def bench(name):
+    """
+    Register a benchmark. The decorated function does the setup and returns
+    the operation to time, called with no arguments.
+    """
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def run_coroutine(coro):
+    # Coroutines whose streams never block finish on their first step
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError('Coroutine blocked outside an event loop')
+
+
+# Benchmarks ---------------------------------------------------------------- #
+@bench('noop')
+def bench_noop():
+    # Cost of the timing loop and call itself, included in every other result
+    def op():
+        pass
+    return op
+
+
+@bench('KalmanFilter.update')
+def bench_kalman():
+    from utils.kalman import KalmanFilter
+    kf = KalmanFilter(dt=1, x0=150, x0_acc=0.5)
+    return lambda: kf.update(150.25)
+
+
+@bench('UDKalmanFilter.update')
+def bench_kalman_ud():
+    from utils.kalman_ud import UDKalmanFilter
+    kf = UDKalmanFilter(dt=1, x0=150, x0_acc=0.5)
+    return lambda: kf.update(150.25)
+
+
+@bench('matrix.multiply')
+def bench_multiply():
+    # The filter's own observation and covariance matrices
+    import matrix
+    from utils.kalman import KalmanFilter
+    kf = KalmanFilter(dt=1, x0=150, x0_acc=0.5)
+    H, P = kf.H, kf.P
+    return lambda: matrix.multiply(H, P)
+
+
+@bench('ExponentialMovingAverage.update')
+def bench_ema():
+    from utils.ema import ExponentialMovingAverage
+    ema = ExponentialMovingAverage(0.1)
+    return lambda: ema.update(1.25)
+
+
+@bench('clock.datetime_to_string')
+def bench_datetime_to_string():
+    from utils import clock
+    return lambda: clock.datetime_to_string(1792438343)
+
+
+@bench('clock.string_to_datetime')
+def bench_string_to_datetime():
+    from utils import clock
+    return lambda: clock.string_to_datetime('2026-10-19 12:00:00 -08:00')
+
+
+def stream_bench(size):
+    def setup():
+        import sensor
+        thermo = sensor.PicoThermometer({'ip': 'bench'})
+        thermo.stack = [(1792438343 + 5 * i, 150 + 0.01 * i) for i in range(size)]
+
+        def op():
+            for _ in thermo.get_data_stream():
+                pass
+        return op
+    return setup
+
+
+# The default two minutes of history, an hour and the full 6 hour cook at log_rate 5
+for size in (24, 720, 4320):
+    bench(f'PicoThermometer.get_data_stream[{size}]')(stream_bench(size))
+
+
+@bench('URLPattern.match[static]')
+def bench_match_static():
+    from microdot.microdot import URLPattern
+    pattern = URLPattern('/data/current')
+    return lambda: pattern.match('/data/current')
+
+
+@bench('URLPattern.match[argument]')
+def bench_match_argument():
+    from microdot.microdot import URLPattern
+    pattern = URLPattern('/data/stream/<from_timestamp>')
+    return lambda: pattern.match('/data/stream/2026-10-19%2012:00:00%20-08:00')
+
+
+class FakeReader:
+    # A client's request, read again from the start on every rewind
+    def __init__(self, lines):
+        self.lines = lines
+        self.i = 0
+
+    def rewind(self):
+        self.i = 0
+
+    async def readline(self):
+        line = self.lines[self.i]
+        self.i += 1
+        return line
+
+    async def readexactly(self, n):
+        return b''
+
+
+class FakeWriter:
+    # A client connection that only counts what it's sent
+    def __init__(self):
+        self.bytes = 0
+
+    async def awrite(self, data):
+        self.bytes += len(data)
+
+
+@bench('Request.create')
+def bench_request():
+    from microdot.microdot_asyncio import Request
+    reader = FakeReader([
+        b'GET /data/stream?smoothed HTTP/1.1\r\n',
+        b'Host: 192.168.100.123\r\n',
+        b'User-Agent: Mozilla/5.0\r\n',
+        b'Accept: */*\r\n',
+        b'Connection: keep-alive\r\n',
+        b'\r\n',
+    ])
+    writer = FakeWriter()
+
+    def op():
+        reader.rewind()
+        return run_coroutine(Request.create(None, reader, writer, ('192.168.100.2', 50000)))
+    return op
+
+
+@bench('Response.write[json]')
+def bench_response_json():
+    import sensor
+    from microdot.microdot_asyncio import Response
+    thermo = sensor.PicoThermometer({'ip': 'bench'})
+    response = Response(thermo.get_current_data())
+    writer = FakeWriter()
+    return lambda: run_coroutine(response.write(writer))
+
+
+@bench('Response.write[stream 24]')
+def bench_response_stream():
+    # A new response per call, as a generator body can only be sent once
+    import sensor
+    from microdot.microdot_asyncio import Response
+    thermo = sensor.PicoThermometer({'ip': 'bench'})
+    thermo.stack = [(1792438343 + 5 * i, 150 + 0.01 * i) for i in range(24)]
+    writer = FakeWriter()
+    return lambda: run_coroutine(Response(thermo.get_data_stream()).write(writer))
+
+
+def lcd_bench(method):
+    def setup():
+        from apparatus.i2c_lcd import I2cLcd, FakeI2C, DEFAULT_I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS
+        lcd = I2cLcd(FakeI2C(), DEFAULT_I2C_ADDR, I2C_NUM_ROWS, I2C_NUM_COLS)
+        frames = ['172.4F +1.2/min\n192.168.100.123', '172.5F +1.2/min\n192.168.100.123']
+
+        if method == 'putstr':
+            def op():
+                lcd.move_to(0, 0)
+                lcd.putstr(frames[0])
+        else:
+            # Alternate frames so every call has a change to write
+            state = [0]
+
+            def op():
+                state[0] ^= 1
+                lcd.update(frames[state[0]])
+        return op
+    return setup
+
+
+bench('LcdApi.putstr')(lcd_bench('putstr'))
+bench('LcdApi.update')(lcd_bench('update'))
+
+
+# Measurement --------------------------------------------------------------- #
+def time_calls(op, n):
+    start = ticks_us()
+    for _ in range(n):
+        op()
+    return ticks_diff(ticks_us(), start)
+
+
+def measure_time(op, rounds, round_us):
+    """
+    Fastest time per call [usec] of several rounds, and the calls per round,
+    doubled until a round lasts round_us.
+    """
+    op()
+    n = 1
+    elapsed = time_calls(op, n)
+    while elapsed < round_us and n < MAX_CALLS:
+        n *= 2
+        elapsed = time_calls(op, n)
+
+    best = elapsed
+    for _ in range(rounds - 1):
+        best = min(best, time_calls(op, n))
+    return best / n, n
+
+
+if sys.implementation.name == 'micropython':
+    ALLOC_METHOD = 'gc.mem_alloc'
+
+    def measure_alloc(op):
+        gc.collect()
+        gc.disable()
+        try:
+            start = gc.mem_alloc()
+            for _ in range(ALLOC_CALLS):
+                op()
+            return (gc.mem_alloc() - start) / ALLOC_CALLS
+        finally:
+            gc.enable()
+else:
+    import tracemalloc
+    ALLOC_METHOD = 'tracemalloc peak'
+
+    def measure_alloc(op):
+        tracemalloc.start()
+        try:
+            total = 0
+            for _ in range(ALLOC_CALLS):
+                tracemalloc.reset_peak()
+                start = tracemalloc.get_traced_memory()[0]
+                op()
+                total += tracemalloc.get_traced_memory()[1] - start
+            return total / ALLOC_CALLS
+        finally:
+            tracemalloc.stop()
+
+
+def run(names, rounds, round_us):
+    results = []
+    for name, setup in BENCHMARKS:
+        if names and not any(text in name for text in names):
+            continue
+        op = setup()
+        us, calls = measure_time(op, rounds, round_us)
+        results.append({
+            'name': name,
+            'us_per_op': round(us, 3),
+            'bytes_per_op': round(measure_alloc(op), 1),
+            'calls': calls,
+        })
+        gc.collect()
+
+    return {
+        'implementation': sys.implementation.name,
+        'version': '.'.join(str(v) for v in sys.implementation.version[:3]),
+        'platform': sys.platform,
+        'alloc': ALLOC_METHOD,
+        'rounds': rounds,
+        'results': results,
+    }
+
+
+def compare(before_path, after_path):
+    # Ratio of after to before for every benchmark in both
+    with open(before_path) as f:
+        before = {r['name']: r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = json.load(f)['results']
+
+    print(f'{"benchmark":40s} {"us/op":>10s} {"after":>10s} {"ratio":>7s} {"B/op":>9s} {"after":>9s}')
+    for r in after:
+        b = before.get(r['name'])
+        if b is None:
+            continue
+        ratio = r['us_per_op'] / b['us_per_op'] if b['us_per_op'] else 0
+        print(f'{r["name"]:40s} {b["us_per_op"]:10.3f} {r["us_per_op"]:10.3f} {ratio:7.2f} '
+              f'{b["bytes_per_op"]:9.1f} {r["bytes_per_op"]:9.1f}')
+
+
+def main(argv):
+    names = []
+    rounds = 5
+    round_ms = 50
+    output = None
+    if argv[:1] == ['--compare'] and len(argv) == 3:
+        compare(argv[1], argv[2])
+        return 0
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--filter' and i + 1 < len(argv):
+            names.append(argv[i + 1])
+        elif arg == '--rounds' and i + 1 < len(argv):
+            rounds = max(1, int(argv[i + 1]))
+        elif arg == '--round-ms' and i + 1 < len(argv):
+            round_ms = float(argv[i + 1])
+        elif arg == '-o' and i + 1 < len(argv):
+            output = argv[i + 1]
+        else:
+            print(USAGE)
+            return 2
+        i += 2
+
+    # Simulated hardware on a manual clock, so setup sleeps cost nothing
+    hal.select('sim', speed=0)
+
+    report = json.dumps(run(names, rounds, round_ms * 1000))
+    if output is None:
+        print(report)
+    else:
+        with open(output, 'w') as f:
+            f.write(report + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
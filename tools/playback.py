@@ -0,0 +1,143 @@
+# Replays a raw sensor recording (apparatus/recorder.py) through PicoThermometer.
+#
+# The readings are fed in on a manual virtual clock and averaged into each
+# heartbeat exactly as the sampler would have, so a replay runs as fast as the
+# pipeline computes and always gives the same output. The output is one fixed
+# precision line per heartbeat, so replays of the same cook before and after a
+# change to the filters, the ETA or the server can be diffed. Runs on CPython
+# and on the MicroPython unix port.
+#
+# Usage:
+#   python tools/playback.py cook.bin > before.txt
+#   python tools/playback.py cook.bin --every 5 --stream > after.txt
+#   diff before.txt after.txt
+
+import sys
+
+# Append rather than prepend the repo root, so the MicroPython logging.py
+# there does not shadow the standard library module
+sys.path.append((__file__.rsplit('/', 1)[0] if '/' in __file__ else '.') + '/..')
+
+import hal
+
+USAGE = 'usage: playback.py RECORDING [--every N] [--stream]'
+
+
+class ReplaySensor:
+    """
+    Stands in for the MAX6675, answering with the latest recorded reading.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._error = 0
+
+    def set(self, value):
+        if value is None:
+            self._error = 1
+        else:
+            self.value = value
+            self._error = 0
+
+    def read_fahrenheit(self):
+        return self.value
+
+    def error(self):
+        return self._error
+
+    def ready(self):
+        return True
+
+    def ready_in_ms(self):
+        return 0
+
+
+def format_row(thermo, clock):
+    eta = '-' if thermo.eta is None else f'{thermo.eta:.1f}'
+    oven = '-' if thermo.oven is None else f'{thermo.oven:.1f}'
+    return (
+        f'{clock.datetime_to_string(thermo.timestamp)} '
+        f'{thermo.temperature:.3f} {thermo.rate:+.3f} {thermo.stdev:.3f} {eta} {oven}'
+    )
+
+
+def main(argv):
+    if not argv or argv[0].startswith('-'):
+        print(USAGE)
+        return 2
+    path = argv[0]
+    every = 1
+    stream = False
+    i = 1
+    while i < len(argv):
+        if argv[i] == '--every' and i + 1 < len(argv):
+            every = int(argv[i + 1])
+            i += 1
+        elif argv[i] == '--stream':
+            stream = True
+        else:
+            print(USAGE)
+            return 2
+        i += 1
+
+    # Simulated hardware on a clock that only moves when told to
+    hal.select('sim', speed=0)
+
+    import utime
+    from utils import clock
+    from apparatus.recorder import read_recording
+
+    # Open the recording before sensor, whose own recorder may be set to the same path
+    epoch, records = read_recording(path)
+    utime.set_time(epoch)
+    import sensor
+
+    # All readings come from the recording, on this core
+    sensor.config['dual_core'] = False
+    replay = ReplaySensor()
+    sensor.sensor = replay
+    thermo = sensor.PicoThermometer({'ip': 'playback'})
+    period = int(thermo.heartbeat * 1000)
+
+    def goto(ticks):
+        utime.advance(utime.ticks_diff(ticks, utime.ticks_ms()))
+
+    def heartbeat():
+        # A single pass of the pipeline, read_sensors never awaits when not looping
+        try:
+            thermo.read_sensors(loop=False).send(None)
+        except StopIteration:
+            pass
+        if thermo.counter % every == 0:
+            print(format_row(thermo, clock))
+
+    print('# timestamp temperature rate stdev eta oven')
+    when = utime.ticks_ms()
+    deadline = None
+    for delta, value in records:
+        when = utime.ticks_add(when, delta)
+        while deadline is not None and utime.ticks_diff(when, deadline) >= 0:
+            goto(deadline)
+            heartbeat()
+            deadline = utime.ticks_add(deadline, period)
+
+        goto(when)
+        replay.set(value)
+        if deadline is None:
+            # Like the device, the first heartbeat reads the sensor directly
+            heartbeat()
+            deadline = utime.ticks_add(when, period)
+        elif thermo.sampler is not None:
+            thermo.sampler.accumulate(value, when)
+
+    if stream:
+        print('# smoothed stream')
+        for line in thermo.get_data_stream(smoothed=True):
+            if line:
+                print(line, end='')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,157 @@
+# Host-side batched replay of the device filters over recorded cooks.
+#
+# Runs the same equations as utils/kalman.KalmanFilter and
+# utils/ema.ExponentialMovingAverage, but vectorized with NumPy so that every
+# leading array axis is one cook or one parameter combination. Time is the
+# last axis of the measurement array and is stepped sequentially.
+#
+# This module is for a laptop, not the Pico. It needs NumPy.
+
+import numpy as np
+
+
+def stack_cooks(cooks):
+    """
+    Stack recorded cooks of unequal length into one array, padding with NaN.
+
+    :param cooks: Iterable of 1D sequences of temperature readings [F].
+    :return: Array of shape (n_cooks, max_length).
+    """
+    cooks = [np.asarray(c, dtype=float) for c in cooks]
+    length = max(len(c) for c in cooks)
+    out = np.full((len(cooks), length), np.nan)
+    for i, c in enumerate(cooks):
+        out[i, :len(c)] = c
+    return out
+
+
+def kalman_batch(z, dt=1, x0=68, x0_acc=0.5, meas_acc=None):
+    """
+    Run the KalmanFilter over a batch of measurement series.
+
+    :param z: Measurements, shape (..., T). NaN entries are skipped and the
+        state is held, which allows padded cooks of unequal length.
+    :param dt: Time step between readings [s].
+    :param x0: Initial temperature [F], scalar or broadcastable to the batch.
+    :param x0_acc: Noise scale as in KalmanFilter, scalar or broadcastable
+        to the batch shape, e.g. x0_acc[:, None] against z[None, :, :].
+    :param meas_acc: Measurement noise scale, defaults to x0_acc.
+    :return: (x, P) where x has shape (..., T, 3) and P is the final
+        covariance with shape (..., 3, 3).
+    """
+    z = np.asarray(z, dtype=float)
+    if meas_acc is None:
+        meas_acc = x0_acc
+    batch = np.broadcast_shapes(
+        z.shape[:-1], np.shape(x0), np.shape(x0_acc), np.shape(meas_acc)
+    )
+    n = z.shape[-1]
+    z = np.broadcast_to(z, batch + (n,))
+    acc = np.broadcast_to(np.asarray(x0_acc, dtype=float), batch)
+    meas_acc = np.broadcast_to(np.asarray(meas_acc, dtype=float), batch)
+
+    # State and covariance, one per batch element
+    x = np.zeros(batch + (3,))
+    x[..., 0] = x0
+    P = np.broadcast_to(np.eye(3), batch + (3, 3)).copy()
+
+    F = np.array([
+        [1, dt, 0.5 * dt ** 2],
+        [0, 1, dt],
+        [0, 0, 1]
+    ], dtype=float)
+
+    Q = np.zeros(batch + (3, 3))
+    Q[..., 0, 0] = acc ** 2
+    Q[..., 1, 1] = acc ** 2
+    Q[..., 2, 2] = acc ** 3
+    R = meas_acc ** 2
+
+    out = np.empty(batch + (n, 3))
+    for t in range(n):
+        zt = z[..., t]
+        valid = ~np.isnan(zt)
+
+        # Predict x = Fx, P = FPF^T + Q
+        x_pred = x @ F.T
+        P_pred = F @ P @ F.T + Q
+
+        # Scalar measurement of position: S = HPH^T + R, K = PH^T / S
+        y = zt - x_pred[..., 0]
+        S = P_pred[..., 0, 0] + R
+        K = P_pred[..., :, 0] / S[..., None]
+
+        # Update x = x + Ky, P = (I - KH)P
+        x_new = x_pred + K * y[..., None]
+        P_new = P_pred - K[..., :, None] * P_pred[..., None, 0, :]
+
+        x = np.where(valid[..., None], x_new, x)
+        P = np.where(valid[..., None, None], P_new, P)
+        out[..., t, :] = x
+
+    return out, P
+
+
+def ema_batch(values, alpha):
+    """
+    Run the ExponentialMovingAverage over a batch of series.
+
+    :param values: Series, shape (..., T). NaN entries hold the average.
+    :param alpha: Smoothing factor, scalar or broadcastable to the batch.
+    :return: Array of shape (..., T) with the running average.
+    """
+    values = np.asarray(values, dtype=float)
+    batch = np.broadcast_shapes(values.shape[:-1], np.shape(alpha))
+    n = values.shape[-1]
+    values = np.broadcast_to(values, batch + (n,))
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=float), batch)
+
+    if np.any(alpha <= 0) or np.any(alpha > 1):
+        raise ValueError("Alpha must be in the range (0, 1].")
+
+    ema = np.full(batch, np.nan)
+    out = np.empty(batch + (n,))
+    for t in range(n):
+        v = values[..., t]
+        blended = alpha * v + (1 - alpha) * ema
+        # Initialize with the first value, as in ExponentialMovingAverage
+        ema = np.where(np.isnan(v), ema, np.where(np.isnan(ema), v, blended))
+        out[..., t] = ema
+    return out
+
+
+def replay(z, dt=1, x0=68, x0_acc=0.5, meas_acc=None, alpha=0.01):
+    """
+    Replay cooks through the same pipeline as PicoThermometer.read_sensors.
+
+    :param z: Measurements, shape (..., T).
+    :param alpha: EMA smoothing factor applied to the rate.
+    :return: (temperature, rate) arrays of shape (..., T), rate in F/min.
+    """
+    x, _ = kalman_batch(z, dt=dt, x0=x0, x0_acc=x0_acc, meas_acc=meas_acc)
+    inst_rate = x[..., 1] * (60 / dt)
+    inst_rate = np.where(np.isnan(np.asarray(z, dtype=float)), np.nan, inst_rate)
+    rate = ema_batch(inst_rate, alpha)
+    return x[..., 0], rate
+
+
+if __name__ == "__main__":
+    import time
+
+    # Synthetic cook: slow exponential approach to oven temperature plus noise
+    rng = np.random.default_rng(0)
+    t = np.arange(4 * 3600)
+    cooks = 325 - (325 - 40) * np.exp(-t / 9000) + rng.normal(0, 0.5, (8, t.size))
+
+    accs = np.linspace(0.05, 1.0, 32)
+    alphas = np.linspace(0.002, 0.05, 16)
+
+    start = time.time()
+    temperature, rate = replay(
+        cooks[:, None, None, :],
+        x0_acc=accs[None, :, None],
+        alpha=alphas[None, None, :]
+    )
+    elapsed = time.time() - start
+
+    print(f'Replayed {rate.size} samples ({rate[..., 0].size} series) in {elapsed:.2f}s')
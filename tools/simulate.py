@@ -0,0 +1,165 @@
+# Accelerated end-to-end run of the thermometer against a simulated turkey.
+#
+# Selects the simulated hardware backend, puts a TurkeyProbe (hal/sim/turkey.py)
+# behind every probe's CS pin and runs PicoThermometer.read_sensors on the
+# virtual clock, faster than real time, reporting the device's ETA against
+# the time the model actually reaches the target.
+#
+# By default the event loop runs on the virtual clock itself (hal.run_virtual),
+# jumping to each wake-up, so every heartbeat runs on time however slow the
+# host and the run takes as long as it computes. With --speed the clock runs
+# at a fixed multiple of real time instead, and ticks the host can't keep up
+# with come late or are skipped; the run fails if more than --max-late of them
+# are, as its results no longer reflect the device's timing.
+#
+# Usage:
+#   python tools/simulate.py --oven 325 --weight 12 --door 90:2 --door 150:1
+#   python tools/simulate.py --speed 100
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+# Append rather than prepend the repo root, so the MicroPython logging.py
+# there does not shadow the standard library module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hal
+
+
+def to_celsius(fahrenheit):
+    return (fahrenheit - 32) * 5 / 9
+
+
+def to_fahrenheit(celsius):
+    return celsius * 9 / 5 + 32
+
+
+def time_to_target(model, target, limit):
+    """
+    Seconds from the model's current state until its core reaches target [C],
+    run on a noiseless copy, or None if not within limit seconds.
+    """
+    model = copy.copy(model)
+    start = model.t
+    while model.core < target:
+        if model.t - start > limit:
+            return None
+        model.step(10)
+    return model.t - start
+
+
+def parse_door(text):
+    # 'minute:duration' in minutes
+    start, duration = text.split(':')
+    return float(start) * 60, float(duration) * 60
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the thermometer against a simulated turkey.')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Virtual seconds per real second, 0 to run on the virtual clock as fast as possible')
+    parser.add_argument('--max-late', type=float, default=0.01,
+                        help='Largest fraction of heartbeats late or skipped at a fixed --speed')
+    parser.add_argument('--hours', type=float, default=6, help='Longest cook simulated [h]')
+    parser.add_argument('--oven', type=float, default=325, help='Oven setpoint [F]')
+    parser.add_argument('--start', type=float, default=40, help='Starting bird temperature [F]')
+    parser.add_argument('--weight', type=float, default=12, help='Bird weight [lb]')
+    parser.add_argument('--door', type=parse_door, action='append', default=[],
+                        help='Door opening as minute:duration, repeatable')
+    parser.add_argument('--stall', type=float, default=1.0, help='Evaporative stall strength')
+    parser.add_argument('--noise', type=float, default=0.25, help='Probe noise [C]')
+    parser.add_argument('--target', type=float, default=165, help='Target temperature [F]')
+    parser.add_argument('--every', type=float, default=10, help='Minutes between report lines')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    hal.select('sim', speed=args.speed)
+
+    import asyncio
+    import machine
+    from turkey import TurkeyModel, TurkeyProbe
+    import sensor
+
+    model = TurkeyModel(
+        oven=to_celsius(args.oven),
+        start=to_celsius(args.start),
+        weight=args.weight * 0.4536,
+        doors=args.door,
+        stall=args.stall
+        )
+
+    # The first probe in the breast core, an oven probe in the air, others off-center
+    for i, (name, cs) in enumerate(sensor.config['probes']):
+        probe = TurkeyProbe(
+            model,
+            depth=1.0 if i == 0 else 0.7,
+            air='oven' in name,
+            noise=args.noise,
+            seed=args.seed + i
+            )
+        machine.attach_spi(cs, probe)
+
+    thermo = sensor.PicoThermometer({'ip': 'simulated'})
+    thermo.target = args.target
+    target = to_celsius(args.target)
+
+    errors = []
+
+    async def run():
+        task = asyncio.create_task(thermo.read_sensors())
+
+        print(' min   core F   read F   rate F/min   eta min   true min')
+        while model.t < args.hours * 3600:
+            await asyncio.sleep(args.every * 60)
+            model.sync()
+
+            remaining = time_to_target(model, target, args.hours * 3600)
+            true_eta = None if remaining is None else remaining / 60
+            eta = thermo.eta
+            row = [
+                f'{model.t / 60:4.0f}',
+                f'{to_fahrenheit(model.core):8.1f}',
+                f'{thermo.temperature:8.1f}',
+                f'{thermo.rate:+12.2f}',
+                f'{eta:9.1f}' if eta is not None else '        -',
+                f'{true_eta:10.1f}' if true_eta is not None else '         -',
+            ]
+            print(' '.join(row))
+
+            if eta is not None and true_eta is not None:
+                errors.append(eta - true_eta)
+            if model.core >= target:
+                break
+
+        task.cancel()
+
+    start = time.time()
+    if args.speed:
+        asyncio.run(run())
+    else:
+        hal.run_virtual(run())
+    elapsed = time.time() - start
+
+    print(f'Reached {args.target:.0f}F after {model.t / 60:.0f} min' if model.core >= target
+          else f'Did not reach {args.target:.0f}F in {args.hours:g} h')
+    if errors:
+        mae = sum(abs(e) for e in errors) / len(errors)
+        print(f'ETA error: mean absolute {mae:.1f} min, last {errors[-1]:+.1f} min')
+    timer = thermo.timer
+    print(f'Ticks {timer.ticks}, late {timer.late}, skipped {timer.skipped}, '
+          f'{model.t / elapsed:.0f}x real time' + ('' if args.speed else ' on the virtual clock'))
+
+    # Heartbeats the host couldn't keep up with, the ETA above ran on a different timing than the device
+    missed = (timer.late + timer.skipped) / max(1, timer.ticks + timer.skipped)
+    if missed > args.max_late:
+        print(f'{missed:.1%} of heartbeats late or skipped at {args.speed:g}x, above {args.max_late:.1%}: '
+              'the results do not reflect device timing, lower --speed or leave it out', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+# Host-side parameter sweep for the Kalman noise scales and the EMA alpha.
+#
+# Replays an archive of recorded cooks through tools/replay.py for every
+# candidate setting, spreading the candidates across processes, and writes
+# the best setting to a config file that sensor.py loads at boot.
+#
+# Usage:
+#   python tools/tune.py cooks/ --search random --samples 500 --output config.json
+#
+# A cook file is plain text with one reading per line; the last number on
+# each line is taken as the temperature [F], so both bare values and the
+# "[timestamp, temperature]" lines from /data/stream are accepted.
+
+import argparse
+import itertools
+import os
+import re
+import sys
+
+# Append rather than prepend the repo root, so the MicroPython logging.py
+# there does not shadow the standard library module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tools.replay import replay, stack_cooks
+from utils.config import load_config, save_config
+
+_NUMBER = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
+
+# Per-process copies of the archive, set by _init_worker
+_cooks = None
+_reference = None
+_settings = None
+
+
+def load_cook(path):
+    """
+    Read one recorded cook.
+
+    :param path: Text file with one reading per line.
+    :return: 1D array of temperatures [F].
+    """
+    values = []
+    with open(path, 'r') as f:
+        for line in f:
+            numbers = _NUMBER.findall(line)
+            if numbers:
+                values.append(float(numbers[-1]))
+    return np.array(values)
+
+
+def load_archive(paths):
+    """
+    Read every cook file in the given files or directories.
+
+    :param paths: List of file or directory paths.
+    :return: List of 1D temperature arrays.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, f) for f in sorted(os.listdir(path))]
+        else:
+            files.append(path)
+
+    cooks = [load_cook(f) for f in files]
+    return [c for c in cooks if len(c) > 1]
+
+
+def moving_average(values, window):
+    """
+    Centered moving average along the last axis, ignoring NaN.
+
+    :param values: Array of shape (..., T).
+    :param window: Window length in samples.
+    :return: Array of the same shape.
+    """
+    window = max(1, int(window))
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    pad = [(0, 0)] * (values.ndim - 1) + [(1, 0)]
+    sums = np.cumsum(np.pad(filled, pad), axis=-1)
+    counts = np.cumsum(np.pad(mask.astype(float), pad), axis=-1)
+
+    n = values.shape[-1]
+    lo = np.clip(np.arange(n) - window // 2, 0, n)
+    hi = np.clip(np.arange(n) + window - window // 2, 0, n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = (sums[..., hi] - sums[..., lo]) / (counts[..., hi] - counts[..., lo])
+    return np.where(mask, out, np.nan)
+
+
+def reference(cooks, dt, window):
+    """
+    Non-causal reference temperature and rate for scoring.
+
+    :param cooks: Padded array of shape (n_cooks, T).
+    :param dt: Time step between readings [s].
+    :param window: Smoothing window [s].
+    :return: (temperature, rate) arrays, rate in F/min.
+    """
+    temperature = moving_average(cooks, window / dt)
+    rate = np.gradient(temperature, dt, axis=-1) * 60
+    return temperature, rate
+
+
+def score(temperature, rate, ref_temperature, ref_rate, settings):
+    """
+    Score replayed filter output against the reference.
+
+    :param temperature: Filtered temperature, shape (n_cooks, n_params, T).
+    :param rate: Filtered rate [F/min], same shape.
+    :param ref_temperature: Reference temperature, shape (n_cooks, 1, T).
+    :param ref_rate: Reference rate, shape (n_cooks, 1, T).
+    :param settings: Dict with dt, target, max_lag, eta_horizon and weights.
+    :return: Dict of metric arrays, each of shape (n_params,).
+    """
+    dt = settings['dt']
+
+    # Lag: the shift of the rate estimate that best lines up with the reference
+    shifts = np.arange(0, int(settings['max_lag'] / dt) + 1, max(1, int(10 / dt)))
+    errors = []
+    for s in shifts:
+        diff = rate[..., s:] - ref_rate[..., :rate.shape[-1] - s]
+        errors.append(np.nanmean(diff ** 2, axis=(0, 2)))
+    lag = shifts[np.argmin(np.array(errors), axis=0)] * dt / 60
+
+    # Noise: high-frequency content of the rate estimate
+    noise = np.sqrt(np.nanmean((rate - moving_average(rate, 60 / dt)) ** 2, axis=(0, 2)))
+
+    # Time-to-target: linear ETA at each reading against the actual remaining time
+    target = settings['target']
+    n = rate.shape[-1]
+    reached = ref_temperature[:, 0, :] >= target
+    hit = np.where(reached.any(axis=-1), reached.argmax(axis=-1), -1)
+    remaining = (hit[:, None] - np.arange(n)[None, :]) * dt / 60
+    window = (hit[:, None] >= 0) & (remaining > 0) & (remaining <= settings['eta_horizon'])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        eta = np.where(rate > 0, (target - temperature) / rate, np.nan)
+    eta = np.minimum(eta, 2 * settings['eta_horizon'])
+    eta_error = np.where(window[:, None, :], np.abs(eta - remaining[:, None, :]), np.nan)
+    eta_error = np.where(window[:, None, :] & np.isnan(eta), 2 * settings['eta_horizon'], eta_error)
+    if window.any():
+        eta_error = np.nanmean(eta_error, axis=(0, 2))
+    else:
+        eta_error = np.zeros(rate.shape[1])
+
+    total = (
+        settings['w_lag'] * lag +
+        settings['w_noise'] * noise +
+        settings['w_eta'] * eta_error
+    )
+    return {'lag': lag, 'noise': noise, 'eta_error': eta_error, 'score': total}
+
+
+def _init_worker(cooks, ref_temperature, ref_rate, settings):
+    global _cooks, _reference, _settings
+    _cooks = cooks
+    _reference = (ref_temperature, ref_rate)
+    _settings = settings
+
+
+def _evaluate(params):
+    # params is a list of (x0_acc, meas_acc, alpha) tuples
+    params = np.array(params)
+    temperature, rate = replay(
+        _cooks[:, None, :],
+        dt=_settings['dt'],
+        x0=_settings['x0'],
+        x0_acc=params[None, :, 0],
+        meas_acc=params[None, :, 1],
+        alpha=params[None, :, 2]
+    )
+    metrics = score(temperature, rate, _reference[0], _reference[1], _settings)
+    return [
+        (tuple(p), {k: float(v[i]) for k, v in metrics.items()})
+        for i, p in enumerate(params)
+    ]
+
+
+def candidates(args):
+    """
+    Build the list of (x0_acc, meas_acc, alpha) settings to evaluate.
+    """
+    ranges = [args.x0_acc, args.meas_acc, args.alpha]
+
+    if args.search == 'grid':
+        axes = [np.geomspace(lo, hi, args.steps) for lo, hi in ranges]
+        return list(itertools.product(*axes))
+
+    # Log-uniform random search
+    rng = np.random.default_rng(args.seed)
+    lows = np.log([lo for lo, _ in ranges])
+    highs = np.log([hi for _, hi in ranges])
+    return [tuple(p) for p in np.exp(rng.uniform(lows, highs, (args.samples, 3)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tune the thermometer filter settings.')
+    parser.add_argument('archive', nargs='+', help='Cook files or directories of cook files')
+    parser.add_argument('--search', choices=['grid', 'random'], default='random')
+    parser.add_argument('--samples', type=int, default=200, help='Random search samples')
+    parser.add_argument('--steps', type=int, default=6, help='Grid steps per parameter')
+    parser.add_argument('--x0-acc', type=float, nargs=2, default=[0.02, 2.0])
+    parser.add_argument('--meas-acc', type=float, nargs=2, default=[0.05, 5.0])
+    parser.add_argument('--alpha', type=float, nargs=2, default=[0.001, 0.2])
+    parser.add_argument('--dt', type=float, default=1, help='Seconds between readings')
+    parser.add_argument('--x0', type=float, default=68, help='Initial filter temperature [F]')
+    parser.add_argument('--target', type=float, default=165, help='Target temperature [F]')
+    parser.add_argument('--window', type=float, default=120, help='Reference smoothing [s]')
+    parser.add_argument('--max-lag', type=float, default=900, help='Largest lag searched [s]')
+    parser.add_argument('--eta-horizon', type=float, default=60, help='ETA scoring horizon [min]')
+    parser.add_argument('--w-lag', type=float, default=1.0)
+    parser.add_argument('--w-noise', type=float, default=1.0)
+    parser.add_argument('--w-eta', type=float, default=1.0)
+    parser.add_argument('--chunk', type=int, default=16, help='Settings per worker task')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='config.json')
+    args = parser.parse_args(argv)
+
+    cooks = load_archive(args.archive)
+    if not cooks:
+        parser.error('No cooks found in archive')
+    cooks = stack_cooks(cooks)
+
+    ref_temperature, ref_rate = reference(cooks, args.dt, args.window)
+    settings = {
+        'dt': args.dt,
+        'x0': args.x0,
+        'target': args.target,
+        'max_lag': args.max_lag,
+        'eta_horizon': args.eta_horizon,
+        'w_lag': args.w_lag,
+        'w_noise': args.w_noise,
+        'w_eta': args.w_eta,
+    }
+
+    params = candidates(args)
+    chunks = [params[i:i + args.chunk] for i in range(0, len(params), args.chunk)]
+    print(f'Evaluating {len(params)} settings over {len(cooks)} cooks')
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(cooks, ref_temperature[:, None, :], ref_rate[:, None, :], settings)
+    ) as pool:
+        for chunk in pool.map(_evaluate, chunks):
+            results += chunk
+
+    results.sort(key=lambda r: r[1]['score'])
+    for (x0_acc, meas_acc, alpha), metrics in results[:5]:
+        print(
+            f'x0_acc {x0_acc:.4f} meas_acc {meas_acc:.4f} alpha {alpha:.4f} '
+            f"lag {metrics['lag']:.2f}min noise {metrics['noise']:.3f}F/min "
+            f"eta error {metrics['eta_error']:.1f}min score {metrics['score']:.3f}"
+        )
+
+    (x0_acc, meas_acc, alpha), _ = results[0]
+    config = load_config(args.output)
+    config.update({'x0_acc': x0_acc, 'meas_acc': meas_acc, 'alpha': alpha})
+    save_config(config, args.output)
+    print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import json
+
+# Tunable settings, written by tools/tune.py and uploaded alongside main.py
+CONFIG_FILE = 'config.json'
+
+DEFAULTS = {
+    'x0_acc': 0.25,                     # Kalman process noise scale [F]
+    'meas_acc': None,                   # Kalman measurement noise scale [F], None uses x0_acc
+    'filter': 'standard',               # 'standard' or 'ud' (factored, stable in single precision)
+    'alpha': 0.01,                      # EMA smoothing factor for the rate
+    'smoother_lag': 60,                 # Fixed-lag smoother window [readings]
+    'eta_forget': 0.999,                # Newton-cooling fit forgetting factor per reading
+    'forecast_horizon': 60,             # Forecast cone length [minutes]
+    'forecast_max_sigma': 10,           # Forecast cone stops where its sigma passes this [F], None for no limit
+    'rate_source': 'ema',               # 'ema' of the Kalman velocity or 'regression' over a window
+    'rate_window': 120,                 # Rolling regression window [readings]
+    'rate_horizons': [15, 60, 300],     # EMA bank time constants for the rate [sec]
+    'median_window': 5,                 # Spike filter window ahead of the Kalman filter [readings], 1 disables
+    'oversample': True,                 # Average every MAX6675 conversion into each reading
+    'sensor_backend': 'gpio',           # MAX6675 over 'gpio' (bit-banged) or 'spi' (hardware)
+    'spi_id': 0,                        # Hardware SPI bus
+    'spi_sck': 18,                      # SPI SCK pin
+    'spi_miso': 16,                     # SPI MISO pin, wired to the MAX6675 SO
+    'probes': [['meat', 20]],           # [name, CS pin] per MAX6675 on the shared bus, the first drives the readout
+    'record': None,                     # File to record the first probe's raw readings to, None disables
+    'dual_core': False,                 # Read and filter the first probe on core 1, handing readings to core 0
+    'lcd_period': 2,                    # Seconds between LCD refreshes
+}
+
+
+def load_config(path=CONFIG_FILE):
+    # Start from the defaults and overlay anything in the config file
+    config = dict(DEFAULTS)
+    try:
+        with open(path, 'r') as f:
+            config.update(json.load(f))
+    except OSError:
+        print(f'No {path} found, using default settings')
+    except ValueError:
+        print(f'Error parsing {path}, using default settings')
+
+    return config
+
+
+def save_config(config, path=CONFIG_FILE):
+    with open(path, 'w') as f:
+        json.dump(config, f)
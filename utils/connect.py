@@ -1,5 +1,5 @@
 import network
-import time
+import utime
 import ubinascii
 from env import CONNECTIONS
 from apparatus.lcd import LCD
@@ -28,7 +28,7 @@ def connect_to_network():
         retry -= 1
         print('waiting for connection...')
         LCD.putstr(f'Connecting to\n{SSID[:14]}')
-        time.sleep(2)
+        utime.sleep(2)
     
     LCD.clear()
     # Handle connection error
@@ -43,7 +43,7 @@ def connect_to_network():
         
         LCD.putstr(f'Connected as\n{ip}')
                 
-        time.sleep(2)
+        utime.sleep(2)
         print('IP: ', ip, 'MAC: ', mac)
     
     LCD.clear()
@@ -1,3 +1,5 @@
+import math
+from array import array
 
 class ExponentialMovingAverage:
     def __init__(self, alpha):
@@ -28,3 +30,54 @@ class ExponentialMovingAverage:
             # Update EMA
             self.ema = self.alpha * value + (1 - self.alpha) * self.ema
         return self.ema
+
+
+class ExponentialMovingAverageBank:
+    def __init__(self, taus):
+        """
+        Initialize a bank of time-aware EMAs sharing one input.
+
+        :param taus: Time constants of each horizon [sec], e.g. (15, 60, 300).
+        
+        Each update weights the new value by 1 - exp(-dt / tau) using the real
+        time since the last update, so late or early ticks are weighted correctly.
+        State is held in preallocated arrays and updated in place.
+        
+        """
+        if any(tau <= 0 for tau in taus):
+            raise ValueError("Time constants must be positive.")
+        self.taus = array('f', taus)
+        self.ema = array('f', [0] * len(taus))
+        self.initialized = False
+
+    def update(self, value, dt):
+        """
+        Update every horizon with a new value.
+
+        :param value: New data point.
+        :param dt: Time since the previous data point [sec].
+        :return: The array of updated EMAs, one per horizon.
+        """
+        ema = self.ema
+        if not self.initialized:
+            # Initialize every horizon with the first value
+            for i in range(len(ema)):
+                ema[i] = value
+            self.initialized = True
+        else:
+            taus = self.taus
+            for i in range(len(ema)):
+                ema[i] += (1 - math.exp(-dt / taus[i])) * (value - ema[i])
+        return ema
+
+    def get(self, tau):
+        """
+        Get the EMA for one horizon.
+
+        :param tau: Time constant given at construction [sec].
+        :return: Current EMA for that horizon.
+        """
+        for i in range(len(self.taus)):
+            if self.taus[i] == tau:
+                return self.ema[i]
+        raise ValueError("Unknown time constant.")
@@ -0,0 +1,78 @@
+import math
+import matrix
+
+class KalmanForecast:
+    def __init__(self, kf, step=60, horizon=60, max_sigma=None):
+        '''
+        Forecast cone from propagating the KalmanFilter state and covariance.
+
+        The filter is tuned to track, not to extrapolate, so its acceleration
+        is uncertain enough that sigma grows with the square of the horizon.
+        Points past max_sigma carry no information and are left out, so the
+        cone can be shorter than the horizon.
+
+        kf -- the KalmanFilter to forecast from
+        step -- number of filter steps between forecast points
+        horizon -- largest number of forecast points
+        max_sigma -- largest standard deviation of a forecast point [F], None for no limit
+        '''
+        self.kf = kf
+        self.horizon = horizon
+        self.max_sigma = max_sigma
+
+        # Transition over one forecast step, F^step
+        self.F = kf.I
+        for _ in range(step):
+            self.F = matrix.multiply(kf.F, self.F)
+        self.F_T = matrix.transpose(self.F)
+
+        # Process noise accumulated over one forecast step
+        self.Q = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        F_T = matrix.transpose(kf.F)
+        for _ in range(step):
+            self.Q = matrix.add(matrix.multiply(matrix.multiply(kf.F, self.Q), F_T), kf.Q)
+
+        # Cached forecast, first point is the current state
+        self.mean = []
+        self.sigma = []
+
+    def update(self, x=None, P=None):
+        '''
+        Propagate a state and covariance over the horizon, by default the filter's current ones
+
+        x -- state to forecast from, e.g. a copy published by another core
+        P -- its covariance
+        '''
+        if x is None:
+            x = self.kf.x
+            P = self.kf.P
+        mean = [x[0]]
+        sigma = [math.sqrt(P[0][0])]
+
+        for _ in range(self.horizon):
+            # x = Fx, P = FPF^T + Q
+            x = matrix.multiply(self.F, x)
+            P = matrix.add(matrix.multiply(matrix.multiply(self.F, P), self.F_T), self.Q)
+            s = math.sqrt(P[0][0])
+            if self.max_sigma is not None and s > self.max_sigma:
+                # Sigma only grows from here
+                break
+            mean.append(x[0])
+            sigma.append(s)
+
+        self.mean = mean
+        self.sigma = sigma
+
+
+if __name__ == "__main__":
+    from kalman import KalmanFilter
+
+    kf = KalmanFilter()
+    for z in [68.1, 70.5, 74, 78.5, 82.8, 86.1, 90]:
+        kf.update(z)
+
+    forecast = KalmanForecast(kf, step=1, horizon=5)
+    forecast.update()
+
+    for mean, sigma in zip(forecast.mean, forecast.sigma):
+        print(f'{mean:.2f} ± {sigma:.2f}')
@@ -1,7 +1,7 @@
 import matrix
 
 class KalmanFilter:
-    def __init__(self, dt=1, x0=68, x0_acc=0.5):
+    def __init__(self, dt=1, x0=68, x0_acc=0.5, meas_acc=None, H=None, R=None):
         '''
         x0 -- initial position (temperature) [F]
         v0 -- initial velocity [F/sec]
@@ -9,10 +9,23 @@ class KalmanFilter:
         x0_acc -- initial position accuracy (1-standard deviation) [F]
         v0_acc -- initial velocity accuracy (1-standard deviation) [F/sec]
         a0_acc -- initial acceleration accuracy (1-standard deviation) [F/sec^2]
+        meas_acc -- measurement accuracy (1-standard deviation) [F], defaults to x0_acc
+        H -- measurement matrix, one row per simultaneous measurement, defaults to
+            the temperature alone [[1, 0, 0]]
+        R -- measurement noise covariance, one row and column per row of H,
+            defaults to meas_acc**2 on the diagonal
         '''
+        if meas_acc is None:
+            meas_acc = x0_acc
+        if H is None:
+            H = [[1, 0, 0]]
+        m = len(H)
+        if R is None:
+            R = [[meas_acc ** 2 if i == j else 0 for j in range(m)] for i in range(m)]
         
         # State
         self.x = [x0, 0, 0]
+        self.x_prior = self.x
         
         # State covariance
         self.P = [
@@ -20,6 +33,7 @@ class KalmanFilter:
             [0, 1, 0],
             [0, 0, 1]
         ]
+        self.P_prior = self.P
     
         # Process model (state transition matrix)
         self.F = [
@@ -36,14 +50,10 @@ class KalmanFilter:
         ]
         
         # Measurement matrix
-        self.H = [
-            [1, 0, 0]
-        ]
+        self.H = H
         
         # Measurement noise covariance matrix
-        self.R = [
-            [x0_acc ** 2]
-        ]
+        self.R = R
         
         # Identity matrix
         self.I = [
@@ -51,6 +61,11 @@ class KalmanFilter:
             [0, 1, 0],
             [0, 0, 1]
         ]
+        
+        # Preallocated storage for the gain solve, one row per measurement
+        self._m = len(self.H)
+        self._S = matrix.Matrix(self._m, self._m, typecode='d')
+        self._K_T = matrix.Matrix(self._m, 3, typecode='d')
     
     def predict(self):
         '''
@@ -69,27 +84,64 @@ class KalmanFilter:
 
     def update(self, z):
         '''
-        Update the state with a measurement
+        Update the state with a measurement, a number when H has a single row,
+        else a list with one value per row
         '''
         
         # Predict the next state before updating
         self.predict()
         
+        # Keep the prediction for smoothing, x and P are replaced not mutated
+        self.x_prior = self.x
+        self.P_prior = self.P
+        
+        if self._m == 1:
+            self._update_scalar(z)
+        else:
+            self._update_vector(z)
+    
+    def _update_scalar(self, z):
+        # Single measurement, S is a scalar so the gain is a division
+        h = self.H[0]
+        x = self.x
+        P = self.P
+        
+        # HP, also (PH^T)^T as P is symmetric
+        HP = [h[0] * P[0][j] + h[1] * P[1][j] + h[2] * P[2][j] for j in range(3)]
+        
+        # Measurement residual y = z - Hx and its covariance S = HPH^T + R
+        y = z - (h[0] * x[0] + h[1] * x[1] + h[2] * x[2])
+        S = HP[0] * h[0] + HP[1] * h[1] + HP[2] * h[2] + self.R[0][0]
+        
+        # Kalman gain K = PH^T / S
+        K = [HP[0] / S, HP[1] / S, HP[2] / S]
+        
+        # Update state x = x + Ky and covariance P = (I - KH)P = P - K(HP)
+        self.x = [x[i] + K[i] * y for i in range(3)]
+        self.P = [[P[i][j] - K[i] * HP[j] for j in range(3)] for i in range(3)]
+    
+    def _update_vector(self, z):
+        m = self._m
+        
         # Measurement residual y = z - Hx
-        y = matrix.subtract([z], matrix.multiply(self.H, self.x))
+        y = matrix.subtract(list(z), matrix.multiply(self.H, self.x))
         
         # Measurement residual covariance S = HPH^T + R
         H_T = matrix.transpose(self.H)
         HP = matrix.multiply(self.H, self.P)
-        HPH_T = matrix.multiply(HP, H_T)
-        S = matrix.add(HPH_T, self.R)
-        
-        # Kalman gain K = PH^TS^-1
-        # S_inv = matrix.invert(S)
-        S_inv = [1 / S[0]]
-        H_T = matrix.transpose(self.H)
-        PH_T = matrix.multiply(self.P, H_T)
-        K = matrix.multiply(PH_T, S_inv)
+        S = matrix.add(matrix.multiply(HP, H_T), self.R)
+        
+        # Kalman gain K = PH^TS^-1, solving S K^T = HP by Cholesky rather than inverting S
+        S_data = self._S.data
+        K_T_data = self._K_T.data
+        for i in range(m):
+            for j in range(m):
+                S_data[i * m + j] = S[i][j]
+            for j in range(3):
+                K_T_data[i * 3 + j] = HP[i][j]
+        matrix.cholesky(self._S)
+        matrix.cholesky_solve(self._S, self._K_T)
+        K = [[K_T_data[j * 3 + i] for j in range(m)] for i in range(3)]
         
         # Update state x = x + Ky
         self.x = matrix.add(self.x, matrix.multiply(K, y))
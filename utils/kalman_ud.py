@@ -0,0 +1,204 @@
+from array import array
+
+class UDKalmanFilter:
+    def __init__(self, dt=1, x0=68, x0_acc=0.5, meas_acc=None):
+        '''
+        Same filter as KalmanFilter, with the covariance kept factored as
+        P = UDU^T (U unit upper triangular, D diagonal). The measurement update
+        uses Bierman's algorithm and the prediction Thornton's modified weighted
+        Gram-Schmidt, so P stays symmetric and positive definite in single
+        precision array('f') storage with no per-tick allocation.
+
+        x0 -- initial position (temperature) [F]
+        x0_acc -- initial position accuracy (1-standard deviation) [F]
+        meas_acc -- measurement accuracy (1-standard deviation) [F], defaults to x0_acc
+        '''
+        if meas_acc is None:
+            meas_acc = x0_acc
+        n = 3
+        self.n = n
+
+        # State
+        self.x = array('f', [x0, 0, 0])
+        self.x_prior = array('f', self.x)
+
+        # Covariance factors, P = I to start
+        self.U = array('f', [1, 0, 0, 0, 1, 0, 0, 0, 1])
+        self.D = array('f', [1, 1, 1])
+        self.U_prior = array('f', self.U)
+        self.D_prior = array('f', self.D)
+
+        # Process model (state transition matrix)
+        self.F = [
+            [1, dt, 0.5 * dt ** 2],
+            [0, 1, dt],
+            [0, 0, 1]
+        ]
+
+        # Process noise covariance, diagonal
+        self.Q = [
+            [x0_acc**2, 0, 0],
+            [0, x0_acc**2, 0],
+            [0, 0, x0_acc**3]
+        ]
+
+        # Measurement matrix
+        self.H = [
+            [1, 0, 0]
+        ]
+
+        # Measurement noise covariance matrix
+        self.R = [
+            [meas_acc ** 2]
+        ]
+
+        # Identity matrix
+        self.I = [
+            [1, 0, 0],
+            [0, 1, 0],
+            [0, 0, 1]
+        ]
+
+        # Preallocated work storage
+        self._F = array('f', [v for row in self.F for v in row])
+        self._q = array('f', [self.Q[i][i] for i in range(n)])
+        self._h = array('f', self.H[0])
+        self._W = array('f', [0] * (n * 2 * n))     # [FU | I], n x 2n
+        self._Dw = array('f', [0] * (2 * n))        # [D, q]
+        self._xw = array('f', [0] * n)
+        self._f = array('f', [0] * n)
+        self._v = array('f', [0] * n)
+        self._k = array('f', [0] * n)
+
+    @property
+    def P(self):
+        '''
+        Covariance UDU^T, built on request
+        '''
+        return self._compose(self.U, self.D)
+
+    @property
+    def P_prior(self):
+        '''
+        Predicted covariance from the last update, built on request
+        '''
+        return self._compose(self.U_prior, self.D_prior)
+
+    def _compose(self, U, D):
+        n = self.n
+        P = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        for i in range(n):
+            for j in range(i, n):
+                s = 0
+                for k in range(j, n):
+                    s += U[i * n + k] * D[k] * U[j * n + k]
+                P[i][j] = s
+                P[j][i] = s
+        return P
+
+    def predict(self):
+        '''
+        Predict the next state, x = Fx and UDU^T = FUDU^TF^T + Q by Thornton's MWGS
+        '''
+        n = self.n
+        F, U, D, W, Dw, x, xw = self._F, self.U, self.D, self._W, self._Dw, self.x, self._xw
+
+        for i in range(n):
+            s = 0
+            for k in range(n):
+                s += F[i * n + k] * x[k]
+            xw[i] = s
+        for i in range(n):
+            x[i] = xw[i]
+
+        # W = [FU | I], Dw = [D, q]
+        m = 2 * n
+        for i in range(n):
+            for j in range(n):
+                s = 0
+                for k in range(j + 1):
+                    s += F[i * n + k] * U[k * n + j]
+                W[i * m + j] = s
+            for j in range(n):
+                W[i * m + n + j] = 1 if i == j else 0
+            Dw[i] = D[i]
+            Dw[n + i] = self._q[i]
+
+        # Orthogonalize the rows of W against the Dw-weighted inner product, last row first
+        for j in range(n - 1, -1, -1):
+            d = 0
+            for k in range(m):
+                w = W[j * m + k]
+                d += w * w * Dw[k]
+            D[j] = d
+            U[j * n + j] = 1
+            for i in range(j):
+                s = 0
+                for k in range(m):
+                    s += W[i * m + k] * Dw[k] * W[j * m + k]
+                u = s / d
+                U[i * n + j] = u
+                for k in range(m):
+                    W[i * m + k] -= u * W[j * m + k]
+            for i in range(j + 1, n):
+                U[i * n + j] = 0
+
+    def update(self, z):
+        '''
+        Update the state with a measurement by Bierman's algorithm
+        '''
+
+        # Predict the next state before updating
+        self.predict()
+
+        # Keep the prediction for smoothing
+        n = self.n
+        for i in range(n):
+            self.x_prior[i] = self.x[i]
+        for i in range(n * n):
+            self.U_prior[i] = self.U[i]
+        for i in range(n):
+            self.D_prior[i] = self.D[i]
+
+        U, D, h, f, v, k, x = self.U, self.D, self._h, self._f, self._v, self._k, self.x
+
+        # f = U^T h, v = D f
+        for j in range(n):
+            s = h[j]
+            for i in range(j):
+                s += U[i * n + j] * h[i]
+            f[j] = s
+            v[j] = D[j] * s
+            k[j] = 0
+
+        # Measurement residual y = z - hx
+        y = z
+        for i in range(n):
+            y -= h[i] * x[i]
+
+        alpha = self.R[0][0]
+        for j in range(n):
+            beta = alpha
+            alpha += f[j] * v[j]
+            p = -f[j] / beta
+            D[j] *= beta / alpha
+            for i in range(j):
+                u = U[i * n + j]
+                U[i * n + j] = u + p * k[i]
+                k[i] += v[j] * u
+            k[j] = v[j]
+
+        # Update state x = x + Ky, with K = k / alpha
+        for i in range(n):
+            x[i] += k[i] / alpha * y
+
+
+if __name__ == "__main__":
+    kf = UDKalmanFilter()
+
+    measurements = [68.1, 70.5, 74, 78.5, 82.8, 86.1, 90]
+
+    for z in measurements:
+        kf.update(z)
+
+        print(f'x: {kf.x[0]:.2f} v: {kf.x[1]:.2f} a: {kf.x[2]:.2f} D: {min(kf.D):.2e}')
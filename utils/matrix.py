@@ -1,4 +1,5 @@
 # Module contains matrix operations
+from array import array
 
 def multiply(A, B):
     """
@@ -94,14 +95,16 @@ def invert(matrix):
         """
         Calculates the cofactor of a 3x3 matrix for a given element.
         """
-        minor = [row[:col] + row[col + 1:] for row in (matrix[:row] + matrix[row + 1:])]
-        return (-1) ** (row + col) * determinant(minor)
+        minor = [r[:col] + r[col + 1:] for r in (matrix[:row] + matrix[row + 1:])]
+        a, b = minor[0]
+        c, d = minor[1]
+        return (-1) ** (row + col) * (a * d - b * c)
 
     def adjoint(matrix):
         """
-        Calculates the adjoint of a 3x3 matrix.
+        Calculates the adjoint of a 3x3 matrix (transpose of the cofactors).
         """
-        return [[cofactor(matrix, i, j) for j in range(3)] for i in range(3)]
+        return [[cofactor(matrix, j, i) for j in range(3)] for i in range(3)]
 
     det = determinant(matrix)
     if det == 0:
@@ -109,4 +112,287 @@ def invert(matrix):
 
     adj = adjoint(matrix)
     return [[adj[i][j] / det for j in range(3)] for i in range(3)]
-    
\ No newline at end of file
+    
+
+class Matrix:
+    """
+    Dense matrix backed by a flat array('f'), for allocation-free updates.
+
+    Elements are addressed through row and column strides, so a transpose is
+    a view over the same storage rather than a copy. Pass typecode='d' for
+    double storage where the platform supports it.
+    """
+    __slots__ = ('data', 'rows', 'cols', 'row_stride', 'col_stride', '_T')
+
+    def __init__(self, rows, cols, data=None, typecode='f'):
+        self.rows = rows
+        self.cols = cols
+        self.row_stride = cols
+        self.col_stride = 1
+        self._T = None
+        if data is None:
+            self.data = array(typecode, [0] * (rows * cols))
+        else:
+            self.data = array(typecode, data)
+
+    @classmethod
+    def from_list(cls, values, typecode='f'):
+        """
+        Build a matrix from nested lists, or a column vector from a flat list
+        """
+        if isinstance(values[0], list):
+            return cls(len(values), len(values[0]), [x for row in values for x in row], typecode)
+        return cls(len(values), 1, values, typecode)
+
+    @classmethod
+    def identity(cls, n, typecode='f'):
+        m = cls(n, n, typecode=typecode)
+        for i in range(n):
+            m.data[i * n + i] = 1
+        return m
+
+    def to_list(self):
+        return [[self[i, j] for j in range(self.cols)] for i in range(self.rows)]
+
+    def __getitem__(self, index):
+        i, j = index
+        return self.data[i * self.row_stride + j * self.col_stride]
+
+    def __setitem__(self, index, value):
+        i, j = index
+        self.data[i * self.row_stride + j * self.col_stride] = value
+
+    @property
+    def T(self):
+        """
+        Transposed view sharing this matrix's storage, built on first use
+        """
+        if self._T is None:
+            view = Matrix.__new__(Matrix)
+            view.data = self.data
+            view.rows = self.cols
+            view.cols = self.rows
+            view.row_stride = self.col_stride
+            view.col_stride = self.row_stride
+            view._T = self
+            self._T = view
+        return self._T
+
+    def fill(self, value):
+        data = self.data
+        for i in range(len(data)):
+            data[i] = value
+        return self
+
+    def copy_from(self, other):
+        """
+        Copy the elements of another matrix of the same shape into this one
+        """
+        if self.rows != other.rows or self.cols != other.cols:
+            raise ValueError("Matrix dimensions do not match")
+        a, o = other.data, self.data
+        ars, acs = other.row_stride, other.col_stride
+        ors, ocs = self.row_stride, self.col_stride
+        for i in range(self.rows):
+            for j in range(self.cols):
+                o[i * ors + j * ocs] = a[i * ars + j * acs]
+        return self
+
+
+def matmul_into(out, A, B):
+    """
+    Multiply matrices A and B into the preallocated matrix out.
+    out must not share storage with A or B.
+    """
+    if A.cols != B.rows or out.rows != A.rows or out.cols != B.cols:
+        raise ValueError("Matrix dimensions do not match")
+
+    a, b, o = A.data, B.data, out.data
+    ars, acs = A.row_stride, A.col_stride
+    brs, bcs = B.row_stride, B.col_stride
+    ors, ocs = out.row_stride, out.col_stride
+    for i in range(A.rows):
+        for j in range(B.cols):
+            total = 0.0
+            ai = i * ars
+            bj = j * bcs
+            for k in range(A.cols):
+                total += a[ai + k * acs] * b[k * brs + bj]
+            o[i * ors + j * ocs] = total
+    return out
+
+
+def add_into(out, A, B):
+    """
+    Add matrices A and B into the preallocated matrix out. out may be A or B.
+    """
+    if A.rows != B.rows or A.cols != B.cols or out.rows != A.rows or out.cols != A.cols:
+        raise ValueError("Matrix dimensions do not match")
+    a, b, o = A.data, B.data, out.data
+    ars, acs = A.row_stride, A.col_stride
+    brs, bcs = B.row_stride, B.col_stride
+    ors, ocs = out.row_stride, out.col_stride
+    for i in range(A.rows):
+        for j in range(A.cols):
+            o[i * ors + j * ocs] = a[i * ars + j * acs] + b[i * brs + j * bcs]
+    return out
+
+
+def subtract_into(out, A, B):
+    """
+    Subtract matrix B from matrix A into the preallocated matrix out. out may be A or B.
+    """
+    if A.rows != B.rows or A.cols != B.cols or out.rows != A.rows or out.cols != A.cols:
+        raise ValueError("Matrix dimensions do not match")
+    a, b, o = A.data, B.data, out.data
+    ars, acs = A.row_stride, A.col_stride
+    brs, bcs = B.row_stride, B.col_stride
+    ors, ocs = out.row_stride, out.col_stride
+    for i in range(A.rows):
+        for j in range(A.cols):
+            o[i * ors + j * ocs] = a[i * ars + j * acs] - b[i * brs + j * bcs]
+    return out
+
+
+def scale_into(out, A, c):
+    """
+    Multiply matrix A by a scalar into the preallocated matrix out. out may be A.
+    """
+    if out.rows != A.rows or out.cols != A.cols:
+        raise ValueError("Matrix dimensions do not match")
+    a, o = A.data, out.data
+    ars, acs = A.row_stride, A.col_stride
+    ors, ocs = out.row_stride, out.col_stride
+    for i in range(A.rows):
+        for j in range(A.cols):
+            o[i * ors + j * ocs] = a[i * ars + j * acs] * c
+    return out
+
+
+def cholesky(A):
+    """
+    Factor a symmetric positive-definite matrix A = LL^T in place.
+    The lower triangle of A is overwritten with L; the upper triangle is not used.
+    """
+    n = A.rows
+    if A.cols != n:
+        raise ValueError("Matrix must be square")
+
+    a, rs, cs = A.data, A.row_stride, A.col_stride
+    for j in range(n):
+        jr = j * rs
+        d = a[jr + j * cs]
+        for k in range(j):
+            d -= a[jr + k * cs] * a[jr + k * cs]
+        if d <= 0:
+            raise ValueError("Matrix is not positive definite")
+        d = d ** 0.5
+        a[jr + j * cs] = d
+        for i in range(j + 1, n):
+            ir = i * rs
+            s = a[ir + j * cs]
+            for k in range(j):
+                s -= a[ir + k * cs] * a[jr + k * cs]
+            a[ir + j * cs] = s / d
+    return A
+
+
+def cholesky_solve(L, B):
+    """
+    Solve LL^T X = B in place, overwriting B with X.
+    L is the factor from cholesky; B may have several columns.
+    """
+    n = L.rows
+    if B.rows != n:
+        raise ValueError("Matrix dimensions do not match")
+
+    l, lrs, lcs = L.data, L.row_stride, L.col_stride
+    b, brs, bcs = B.data, B.row_stride, B.col_stride
+    for c in range(B.cols):
+        bc = c * bcs
+        # Forward substitution Ly = b
+        for i in range(n):
+            s = b[i * brs + bc]
+            for k in range(i):
+                s -= l[i * lrs + k * lcs] * b[k * brs + bc]
+            b[i * brs + bc] = s / l[i * lrs + i * lcs]
+        # Back substitution L^Tx = y
+        for i in range(n - 1, -1, -1):
+            s = b[i * brs + bc]
+            for k in range(i + 1, n):
+                s -= l[k * lrs + i * lcs] * b[k * brs + bc]
+            b[i * brs + bc] = s / l[i * lrs + i * lcs]
+    return B
+
+
+def lu(A, pivots):
+    """
+    Factor a square matrix PA = LU in place with partial pivoting (Doolittle).
+    A is overwritten with L (unit diagonal, not stored) and U; the row
+    permutation is written to the preallocated sequence pivots.
+    """
+    n = A.rows
+    if A.cols != n or len(pivots) < n:
+        raise ValueError("Matrix dimensions do not match")
+
+    a, rs, cs = A.data, A.row_stride, A.col_stride
+    for i in range(n):
+        pivots[i] = i
+
+    for k in range(n):
+        kr = k * rs
+        # Choose the largest pivot in the column
+        p = k
+        largest = abs(a[kr + k * cs])
+        for i in range(k + 1, n):
+            if abs(a[i * rs + k * cs]) > largest:
+                largest = abs(a[i * rs + k * cs])
+                p = i
+        if largest == 0:
+            raise ValueError("Matrix is singular")
+
+        if p != k:
+            pr = p * rs
+            for j in range(n):
+                a[kr + j * cs], a[pr + j * cs] = a[pr + j * cs], a[kr + j * cs]
+            pivots[k], pivots[p] = pivots[p], pivots[k]
+
+        for i in range(k + 1, n):
+            ir = i * rs
+            f = a[ir + k * cs] / a[kr + k * cs]
+            a[ir + k * cs] = f
+            for j in range(k + 1, n):
+                a[ir + j * cs] -= f * a[kr + j * cs]
+    return A
+
+
+def lu_solve(LU, pivots, B, work):
+    """
+    Solve AX = B in place from the factors of lu, overwriting B with X.
+    work is a preallocated sequence of at least LU.rows elements.
+    """
+    n = LU.rows
+    if B.rows != n or len(work) < n:
+        raise ValueError("Matrix dimensions do not match")
+
+    a, rs, cs = LU.data, LU.row_stride, LU.col_stride
+    b, brs, bcs = B.data, B.row_stride, B.col_stride
+    for c in range(B.cols):
+        bc = c * bcs
+        # Apply the row permutation, then forward substitution Ly = Pb
+        for i in range(n):
+            work[i] = b[pivots[i] * brs + bc]
+        for i in range(n):
+            s = work[i]
+            for k in range(i):
+                s -= a[i * rs + k * cs] * work[k]
+            work[i] = s
+        # Back substitution Ux = y
+        for i in range(n - 1, -1, -1):
+            s = work[i]
+            for k in range(i + 1, n):
+                s -= a[i * rs + k * cs] * work[k]
+            work[i] = s / a[i * rs + i * cs]
+        for i in range(n):
+            b[i * brs + bc] = work[i]
+    return B
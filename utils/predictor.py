@@ -0,0 +1,103 @@
+import math
+
+class NewtonCoolingFit:
+    def __init__(self, forget=0.999, min_spread=1.0):
+        """
+        Incremental fit of Newton's law of heating, T(t) = T_oven - (T_oven - T0) * exp(-k t).
+
+        Integrating dT/dt = k * (T_oven - T) gives a model that is linear in
+        its coefficients and needs no noisy derivative:
+
+            T(t) = c0 + k * T_oven * t - k * I(t),  where I(t) = integral of T dt
+
+        The regression of T on (t, I) is kept as exponentially weighted means and
+        co-moments, so each update is O(1) with no re-scan of past readings.
+
+        :param forget: Weight kept by past readings on each update (0 < forget ≤ 1).
+        :param min_spread: Minimum temperature standard deviation [F] before the fit is trusted.
+        """
+        if not (0 < forget <= 1):
+            raise ValueError("Forget must be in the range (0, 1].")
+        self.forget = forget
+        self.min_spread = min_spread
+        self.reset()
+
+    def reset(self):
+        self.weight = 0
+        self.last = None    # Previous (t, T) for the running integral
+        self.integral = 0   # Running integral of temperature [F sec]
+        self.mean = [0, 0, 0]   # Weighted means of (t, I, T)
+        self.C = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]  # Weighted co-moments of (t, I, T)
+        self.k = None       # Heating rate constant [1/sec]
+        self.oven = None    # Asymptotic (oven) temperature [F]
+
+    def update(self, t, temperature):
+        """
+        Add a reading to the fit.
+
+        :param t: Time of the reading [sec], any fixed origin.
+        :param temperature: Temperature [F].
+        """
+        if self.last is not None:
+            t_last, T_last = self.last
+            self.integral += 0.5 * (temperature + T_last) * (t - t_last)
+        self.last = (t, temperature)
+
+        # Weighted Welford update of the means and co-moments
+        v = (t, self.integral, temperature)
+        self.weight = self.forget * self.weight + 1
+        d = [v[i] - self.mean[i] for i in range(3)]
+        for i in range(3):
+            self.mean[i] += d[i] / self.weight
+        for i in range(3):
+            for j in range(3):
+                self.C[i][j] = self.forget * self.C[i][j] + d[i] * (v[j] - self.mean[j])
+
+        self.solve()
+
+    def solve(self):
+        # Least squares for T = c0 + c1 t + c2 I, with c1 = k T_oven and c2 = -k
+        self.k = None
+        self.oven = None
+
+        C = self.C
+        if C[2][2] < self.min_spread ** 2 * self.weight:
+            return
+
+        det = C[0][0] * C[1][1] - C[0][1] * C[1][0]
+        if det <= 1e-9 * C[0][0] * C[1][1]:
+            return
+
+        c1 = (C[1][1] * C[0][2] - C[0][1] * C[1][2]) / det
+        c2 = (C[0][0] * C[1][2] - C[1][0] * C[0][2]) / det
+        if c2 >= 0:
+            return
+
+        self.k = -c2
+        self.oven = c1 / self.k
+
+    def time_to_target(self, temperature, target):
+        """
+        Time until the target is reached on the fitted curve.
+
+        :param temperature: Current temperature [F].
+        :param target: Target temperature [F].
+        :return: Seconds to target, 0 if already reached, or None if the fit
+            is not usable or never reaches the target.
+        """
+        if temperature >= target:
+            return 0
+        if self.k is None or self.oven <= target:
+            return None
+        return math.log((self.oven - temperature) / (self.oven - target)) / self.k
+
+
+if __name__ == "__main__":
+    # Turkey heating towards a 325F oven with k = 1/9000 per second
+    fit = NewtonCoolingFit()
+    oven, T0, k = 325, 40, 1 / 9000
+    for t in range(0, 3600, 5):
+        T = oven - (oven - T0) * math.exp(-k * t)
+        fit.update(t, T)
+
+    print(f'oven: {fit.oven:.1f}F k: {1 / fit.k:.0f}s eta: {fit.time_to_target(T, 165) / 60:.1f}min')
@@ -27,4 +27,95 @@ def calc_slope(y):
         m_denom += x_i * (x_i - ave_x)
     
     return m_numer / m_denom  
-    
\ No newline at end of file
+    
+# Rolling fit over the last n readings, O(1) per reading
+class RollingLinearFit:
+    def __init__(self, capacity, renormalize=None):
+        """
+        Least squares line over a fixed-capacity window of (x, y) readings.
+
+        Keeps running sums over a ring buffer, so adding a reading and evicting
+        the oldest is O(1). The sums are rebuilt from the ring every
+        `renormalize` readings (default: capacity) to stop float drift, with x
+        measured from the oldest reading to keep the sums small.
+
+        :param capacity: Number of readings in the window.
+        :param renormalize: Readings between rebuilds of the running sums.
+        """
+        if capacity < 2:
+            raise ValueError("Capacity must be at least 2.")
+        self.capacity = capacity
+        self.renormalize = renormalize or capacity
+        self.xs = [0.0] * capacity
+        self.ys = [0.0] * capacity
+        self.head = 0       # Next slot to write
+        self.n = 0          # Readings in the window
+        self.origin = None  # x offset subtracted before summing
+        self.updates = 0
+        self.sx = self.sy = self.sxy = self.sxx = 0.0
+
+    def update(self, x, y):
+        """
+        Add a reading, evicting the oldest when the window is full.
+
+        :return: Slope of the fitted line, or None with fewer than 2 readings.
+        """
+        if self.origin is None:
+            self.origin = x
+        x -= self.origin
+
+        if self.n == self.capacity:
+            old_x = self.xs[self.head]
+            old_y = self.ys[self.head]
+            self.sx -= old_x
+            self.sy -= old_y
+            self.sxy -= old_x * old_y
+            self.sxx -= old_x * old_x
+        else:
+            self.n += 1
+
+        self.xs[self.head] = x
+        self.ys[self.head] = y
+        self.head = (self.head + 1) % self.capacity
+        self.sx += x
+        self.sy += y
+        self.sxy += x * y
+        self.sxx += x * x
+
+        self.updates += 1
+        if self.updates % self.renormalize == 0:
+            self._rebuild()
+
+        return self.slope()
+
+    def _rebuild(self):
+        # Move the origin to the oldest reading and recompute the sums exactly
+        oldest = self.head if self.n == self.capacity else 0
+        shift = self.xs[oldest]
+        self.origin += shift
+        self.sx = self.sy = self.sxy = self.sxx = 0.0
+        for i in range(self.n):
+            x = self.xs[i] - shift
+            y = self.ys[i]
+            self.xs[i] = x
+            self.sx += x
+            self.sy += y
+            self.sxy += x * y
+            self.sxx += x * x
+
+    def slope(self):
+        if self.n < 2:
+            return None
+        denom = self.n * self.sxx - self.sx * self.sx
+        if denom == 0:
+            return None
+        return (self.n * self.sxy - self.sx * self.sy) / denom
+
+    def intercept(self):
+        """
+        Intercept of the fitted line at the original x origin.
+        """
+        m = self.slope()
+        if m is None:
+            return None
+        return (self.sy - m * self.sx) / self.n - m * self.origin
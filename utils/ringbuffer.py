@@ -0,0 +1,95 @@
+from array import array
+
+class SPSCRing:
+    def __init__(self, capacity=16, width=1, typecode='f'):
+        '''
+        Single-producer single-consumer ring of fixed width records, for
+        handing readings from one thread (core) to another without a lock.
+
+        The producer only writes head and the consumer only writes tail, and
+        each index is stored after the record it covers, so a reader never
+        sees a half written record. One slot is kept empty to tell a full ring
+        from an empty one. Storage is preallocated, put and get don't allocate.
+
+        capacity -- number of slots, holds capacity - 1 records
+        width -- values per record
+        typecode -- array typecode of the values
+        '''
+        self.capacity = capacity
+        self.width = width
+        self.buffer = array(typecode, [0] * (capacity * width))
+        self.head = 0       # Next slot to write, producer only
+        self.tail = 0       # Next slot to read, consumer only
+        self.dropped = 0    # Records refused because the ring was full, producer only
+
+    def put(self, record):
+        '''
+        Append a record, producer side. Returns False and drops the record if full.
+        '''
+        head = self.head
+        following = (head + 1) % self.capacity
+        if following == self.tail:
+            self.dropped += 1
+            return False
+
+        base = head * self.width
+        for i in range(self.width):
+            self.buffer[base + i] = record[i]
+
+        # Publish only once the record is written
+        self.head = following
+        return True
+
+    def get(self, record):
+        '''
+        Copy the oldest record into record, consumer side. Returns False if empty.
+        '''
+        tail = self.tail
+        if tail == self.head:
+            return False
+
+        base = tail * self.width
+        for i in range(self.width):
+            record[i] = self.buffer[base + i]
+
+        # Release the slot only once the record is copied out
+        self.tail = (tail + 1) % self.capacity
+        return True
+
+    def __len__(self):
+        return (self.head - self.tail) % self.capacity
+
+
+if __name__ == "__main__":
+    import _thread
+    import time
+
+    # Producer thread against a consumer polling like the event loop on core 0
+    n = 100000
+    ring = SPSCRing(capacity=8, width=2)
+
+    def produce():
+        record = array('f', [0, 0])
+        i = 0
+        while i < n:
+            record[0] = i % 1000
+            record[1] = -(i % 1000)
+            if ring.put(record):
+                i += 1
+            else:
+                time.sleep(0)
+
+    _thread.start_new_thread(produce, ())
+
+    record = array('f', [0, 0])
+    expected = 0
+    errors = 0
+    while expected < n:
+        if not ring.get(record):
+            time.sleep(0)
+            continue
+        if record[0] != expected % 1000 or record[1] != -record[0]:
+            errors += 1
+        expected += 1
+
+    print(f'received {expected} records in order, {errors} corrupted, producer found the ring full {ring.dropped} times')
@@ -0,0 +1,65 @@
+import asyncio
+import utime
+from utils.statistics import P2Quantile
+
+class DeadlineTimer:
+    def __init__(self, period_ms, late_ms=50):
+        """
+        Periodic timer that sleeps until absolute ticks_ms deadlines, so time
+        spent working between ticks does not add to the period.
+
+        :param period_ms: Tick period [ms].
+        :param late_ms: Lateness above which a tick is counted as late [ms].
+        """
+        self.period_ms = period_ms
+        self.late_ms = late_ms
+        self.deadline = None
+        self.ticks = 0          # Ticks completed
+        self.late = 0           # Ticks that woke more than late_ms after their deadline
+        self.skipped = 0        # Deadlines dropped after an overrun
+        self.max_lateness = 0   # Worst lateness seen [ms]
+        self.lateness = [P2Quantile(p) for p in (0.5, 0.99)]
+
+    async def wait(self):
+        """
+        Sleep until the next deadline. After an overrun the missed deadlines are
+        skipped and the tick runs at once, staying on the original grid.
+
+        :return: Lateness of this tick [ms].
+        """
+        now = utime.ticks_ms()
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline = utime.ticks_add(self.deadline, self.period_ms)
+
+        wait = utime.ticks_diff(self.deadline, now)
+        if wait > 0:
+            await asyncio.sleep(wait / 1000)
+        else:
+            # Coalesce every deadline that has already passed into this tick
+            missed = -wait // self.period_ms
+            self.deadline = utime.ticks_add(self.deadline, missed * self.period_ms)
+            self.skipped += missed
+
+        lateness = utime.ticks_diff(utime.ticks_ms(), self.deadline)
+        self.ticks += 1
+        if lateness > self.late_ms:
+            self.late += 1
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+        for q in self.lateness:
+            q.update(lateness)
+
+        return lateness
+
+    def get_metrics(self):
+        data = {
+            'ticks': self.ticks,
+            'late': self.late,
+            'skipped': self.skipped,
+            'lateness_ms': {
+                f'p{int(q.p * 100)}': q.quantile() for q in self.lateness
+            },
+            'max_lateness_ms': self.max_lateness
+        }
+        return data
@@ -0,0 +1,126 @@
+import matrix
+
+class FixedLagSmoother:
+    def __init__(self, kf, lag=60):
+        '''
+        Fixed-lag Rauch-Tung-Striebel smoother on top of a KalmanFilter.
+
+        update() runs both halves: step() updates the filter and finds the
+        gain, append() extends the window that smooth() reads. They share no
+        state, so the filter can be stepped on one core while another keeps
+        the window, given what step() produced.
+
+        kf -- the KalmanFilter to smooth, updated through this class
+        lag -- number of filter steps kept in the smoothing window
+        '''
+        self.kf = kf
+        self.lag = lag
+        self.steps = 0
+
+        # Filtered states x_k|k in the window, oldest first
+        self.x = []
+
+        # Predicted states x_k+1|k, aligned with the step they predict
+        self.x_prior = []
+
+        # Smoother gains C_k = P_k|k F^T P_k+1|k^-1, aligned with step k
+        self.C = []
+
+        # Preallocated storage for the gain solve
+        self._L = matrix.Matrix(3, 3, typecode='d')
+        self._C_T = matrix.Matrix(3, 3, typecode='d')
+
+    def update(self, z):
+        '''
+        Update the filter with a measurement and extend the window
+        '''
+        C = self.step(z)
+        self.append(self.kf.x, self.kf.x_prior, C)
+
+    def step(self, z):
+        '''
+        Update the filter with a measurement. Returns the gain of the previous
+        step, known now that P_k+1|k is, or None on the first
+        '''
+
+        # Posterior covariance of the previous step, before it's replaced
+        P_prev = self.kf.P
+
+        self.kf.update(z)
+        self.steps += 1
+        if self.steps == 1:
+            return None
+        return self.gain(P_prev, self.kf.P_prior)
+
+    def append(self, x, x_prior, C_prev):
+        '''
+        Extend the window with a filtered state x_k|k, its prediction x_k|k-1
+        and the gain of the step before, as from step()
+        '''
+        if self.x:
+            self.C[-1] = C_prev
+
+        # Copies, since a filter may update its state in place
+        self.x.append(list(x))
+        self.x_prior.append(list(x_prior))
+        self.C.append(None)
+
+        # Fixed length window
+        if len(self.x) > self.lag:
+            self.x.pop(0)
+            self.x_prior.pop(0)
+            self.C.pop(0)
+
+    def gain(self, P, P_prior):
+        '''
+        Smoother gain C = P F^T P_prior^-1, solving P_prior C^T = F P by
+        Cholesky, as both covariances are symmetric
+        '''
+        L = self._L.data
+        C_T = self._C_T.data
+        FP = matrix.multiply(self.kf.F, P)
+        for i in range(3):
+            for j in range(3):
+                L[i * 3 + j] = P_prior[i][j]
+                C_T[i * 3 + j] = FP[i][j]
+        try:
+            matrix.cholesky(self._L)
+        except ValueError:
+            # P_prior is not positive definite, leave this step unsmoothed
+            return [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        matrix.cholesky_solve(self._L, self._C_T)
+        return [[C_T[j * 3 + i] for j in range(3)] for i in range(3)]
+
+    def smooth(self):
+        '''
+        Backward pass over the window, x_k = x_k|k + C_k (x_k+1 - x_k+1|k)
+
+        Returns the smoothed states, oldest first. Only the states are
+        smoothed, so each step is a single 3x3 matrix-vector product.
+        '''
+        n = len(self.x)
+        if n == 0:
+            return []
+
+        smoothed = [None] * n
+        smoothed[-1] = self.x[-1]
+        for k in range(n - 2, -1, -1):
+            residual = matrix.subtract(smoothed[k + 1], self.x_prior[k + 1])
+            smoothed[k] = matrix.add(self.x[k], matrix.multiply(self.C[k], residual))
+
+        return smoothed
+
+
+if __name__ == "__main__":
+    from kalman import KalmanFilter
+
+    kf = KalmanFilter()
+    smoother = FixedLagSmoother(kf, lag=5)
+
+    measurements = [68.1, 70.5, 74, 78.5, 82.8, 86.1, 90]
+
+    for z in measurements:
+        smoother.update(z)
+
+    for x in smoother.smooth():
+        print(f'x: {x[0]:.2f} v: {x[1]:.2f} a: {x[2]:.2f}')
@@ -7,6 +7,7 @@ License: MIT License (https://opensource.org/licenses/MIT)
 """
 
 import math
+import heapq
 
 def mean(data):
     if iter(data) is data:
@@ -95,3 +96,205 @@ def stdev(data, xbar=None):
 
 def pstdev(data, mu=None):
     return math.sqrt(pvariance(data, mu))
+
+class RunningStats:
+    # Single-pass Welford accumulator over every value seen
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta/self.n
+        self._m2 += delta*(x - self.mean)
+
+    def variance(self):
+        if self.n < 2:
+            return 0.0
+        return max(self._m2, 0.0)/(self.n - 1)
+
+    def pvariance(self):
+        if self.n < 1:
+            return 0.0
+        return max(self._m2, 0.0)/self.n
+
+    def stdev(self):
+        return math.sqrt(self.variance())
+
+    def pstdev(self):
+        return math.sqrt(self.pvariance())
+
+class RollingStats(RunningStats):
+    # Welford accumulator over the last `window` values, evicting the oldest
+    def __init__(self, window):
+        if window < 2:
+            raise ValueError("Window must be at least 2.")
+        super().__init__()
+        self.window = window
+        self._ring = [0.0]*window
+        self._head = 0
+
+    def update(self, x):
+        if self.n < self.window:
+            self._ring[self._head] = x
+            self._head = (self._head + 1) % self.window
+            super().update(x)
+            return
+        # Replace the oldest value in one step
+        old = self._ring[self._head]
+        self._ring[self._head] = x
+        self._head = (self._head + 1) % self.window
+        mean = self.mean
+        self.mean += (x - old)/self.n
+        self._m2 += (x - old)*(x - self.mean + old - mean)
+
+class RollingMedian:
+    # Median of the last `window` values with O(log n) insert and evict.
+    # Two heaps hold the lower (negated, max-heap) and upper halves; evicted
+    # values are deleted lazily when they reach the top of a heap.
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("Window must be at least 1.")
+        self.window = window
+        self._ring = [None]*window
+        self._head = 0
+        self._low = []
+        self._high = []
+        self._low_n = 0
+        self._high_n = 0
+        self._delayed = {}
+
+    def update(self, x):
+        # Evict the oldest value once the window is full
+        old = self._ring[self._head]
+        self._ring[self._head] = x
+        self._head = (self._head + 1) % self.window
+
+        if not self._low or x <= -self._low[0]:
+            heapq.heappush(self._low, -x)
+            self._low_n += 1
+        else:
+            heapq.heappush(self._high, x)
+            self._high_n += 1
+
+        if old is not None:
+            self._delayed[old] = self._delayed.get(old, 0) + 1
+            if old <= -self._low[0]:
+                self._low_n -= 1
+                if old == -self._low[0]:
+                    self._prune(self._low, -1)
+            else:
+                self._high_n -= 1
+                if self._high and old == self._high[0]:
+                    self._prune(self._high, 1)
+
+        self._balance()
+
+        # Rebuild if lazily deleted values pile up below the heap tops
+        if len(self._low) + len(self._high) > 2*self.window:
+            self._rebuild()
+
+        return self.median()
+
+    def median(self):
+        if self._low_n > self._high_n:
+            return -self._low[0]
+        return (-self._low[0] + self._high[0])/2
+
+    def _prune(self, heap, sign):
+        while heap:
+            x = sign*heap[0]
+            count = self._delayed.get(x, 0)
+            if not count:
+                break
+            if count == 1:
+                del self._delayed[x]
+            else:
+                self._delayed[x] = count - 1
+            heapq.heappop(heap)
+
+    def _balance(self):
+        if self._low_n > self._high_n + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_n -= 1
+            self._high_n += 1
+            self._prune(self._low, -1)
+        elif self._low_n < self._high_n:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._low_n += 1
+            self._high_n -= 1
+            self._prune(self._high, 1)
+
+    def _rebuild(self):
+        data = sorted(x for x in self._ring if x is not None)
+        half = (len(data) + 1)//2
+        self._low = [-x for x in data[:half]]
+        self._high = data[half:]
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+        self._low_n = len(self._low)
+        self._high_n = len(self._high)
+        self._delayed = {}
+
+class P2Quantile:
+    # Streaming estimate of the p-quantile in constant memory, using the P-square
+    # algorithm (Jain & Chlamtac, 1985): five markers whose heights are adjusted
+    # with piecewise-parabolic interpolation as values arrive.
+    def __init__(self, p):
+        if not (0 < p < 1):
+            raise ValueError("p must be in the range (0, 1).")
+        self.p = p
+        self.n = 0
+        self._q = []
+        self._pos = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5]
+        self._inc = [0, p/2, p, (1 + p)/2, 1]
+
+    def update(self, x):
+        q = self._q
+        pos = self._pos
+        self.n += 1
+        if self.n <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self._desired[i] += self._inc[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d/(pos[i + 1] - pos[i - 1])*(
+                    (pos[i] - pos[i - 1] + d)*(q[i + 1] - q[i])/(pos[i + 1] - pos[i]) +
+                    (pos[i + 1] - pos[i] - d)*(q[i] - q[i - 1])/(pos[i] - pos[i - 1]))
+                if not (q[i - 1] < qp < q[i + 1]):
+                    qp = q[i] + d*(q[i + d] - q[i])/(pos[i + d] - pos[i])
+                q[i] = qp
+                pos[i] += d
+
+    def quantile(self):
+        if self.n == 0:
+            return None
+        if self.n <= 5:
+            # Until the markers first move they are just the sorted values
+            return self._q[int(round(self.p*(self.n - 1)))]
+        return self._q[2]